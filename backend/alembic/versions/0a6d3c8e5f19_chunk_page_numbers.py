@@ -0,0 +1,27 @@
+"""chunk page numbers
+
+Revision ID: 0a6d3c8e5f19
+Revises: f4c8a2b7e630
+Create Date: 2026-10-18 15:02:33.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0a6d3c8e5f19'
+down_revision: Union[str, None] = 'f4c8a2b7e630'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chunks', sa.Column('page_start', sa.Integer(), nullable=True))
+    op.add_column('chunks', sa.Column('page_end', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('chunks', 'page_end')
+    op.drop_column('chunks', 'page_start')
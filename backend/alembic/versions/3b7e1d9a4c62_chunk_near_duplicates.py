@@ -0,0 +1,38 @@
+"""chunk near duplicates
+
+Revision ID: 3b7e1d9a4c62
+Revises: 0a6d3c8e5f19
+Create Date: 2026-10-18 16:41:09.527310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e1d9a4c62'
+down_revision: Union[str, None] = '0a6d3c8e5f19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chunks', sa.Column('canonical_chunk_id', sa.UUID(), nullable=True))
+    op.add_column('chunks', sa.Column('minhash', sa.LargeBinary(), nullable=True))
+    op.add_column('chunks', sa.Column('lsh_bands', postgresql.ARRAY(sa.BigInteger()), nullable=True))
+    op.create_foreign_key(
+        'fk_chunks_canonical_chunk_id', 'chunks', 'chunks', ['canonical_chunk_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index(op.f('ix_chunks_canonical_chunk_id'), 'chunks', ['canonical_chunk_id'], unique=False)
+    op.create_index('ix_chunks_lsh_bands', 'chunks', ['lsh_bands'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chunks_lsh_bands', table_name='chunks', postgresql_using='gin')
+    op.drop_index(op.f('ix_chunks_canonical_chunk_id'), table_name='chunks')
+    op.drop_constraint('fk_chunks_canonical_chunk_id', 'chunks', type_='foreignkey')
+    op.drop_column('chunks', 'lsh_bands')
+    op.drop_column('chunks', 'minhash')
+    op.drop_column('chunks', 'canonical_chunk_id')
@@ -0,0 +1,46 @@
+"""chunk embedding ann index
+
+Revision ID: 5b2e9c1f7a04
+Revises: 383b1c43ad3d
+Create Date: 2026-10-18 09:12:41.302118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e9c1f7a04'
+down_revision: Union[str, None] = '383b1c43ad3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Index type and build parameters come from Settings so that large
+    # deployments can tune them before running the migration.
+    if settings.VECTOR_INDEX_TYPE == "hnsw":
+        op.create_index(
+            'ix_chunks_embedding_hnsw', 'chunks', ['embedding'],
+            unique=False,
+            postgresql_using='hnsw',
+            postgresql_with={'m': settings.HNSW_M, 'ef_construction': settings.HNSW_EF_CONSTRUCTION},
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+        )
+    elif settings.VECTOR_INDEX_TYPE == "ivfflat":
+        op.create_index(
+            'ix_chunks_embedding_ivfflat', 'chunks', ['embedding'],
+            unique=False,
+            postgresql_using='ivfflat',
+            postgresql_with={'lists': settings.IVFFLAT_LISTS},
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+        )
+    op.create_index('ix_chunks_document_id', 'chunks', ['document_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chunks_document_id', table_name='chunks')
+    op.execute('DROP INDEX IF EXISTS ix_chunks_embedding_ivfflat')
+    op.execute('DROP INDEX IF EXISTS ix_chunks_embedding_hnsw')
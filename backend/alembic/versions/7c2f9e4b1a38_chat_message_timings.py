@@ -0,0 +1,26 @@
+"""chat message timings
+
+Revision ID: 7c2f9e4b1a38
+Revises: 3b7e1d9a4c62
+Create Date: 2026-10-18 17:12:46.803215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2f9e4b1a38'
+down_revision: Union[str, None] = '3b7e1d9a4c62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chat_messages', sa.Column('timings', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('chat_messages', 'timings')
@@ -0,0 +1,35 @@
+"""chunk fulltext index
+
+Revision ID: 8d41f0a6c2b7
+Revises: 5b2e9c1f7a04
+Create Date: 2026-10-18 10:03:17.554920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41f0a6c2b7'
+down_revision: Union[str, None] = '5b2e9c1f7a04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chunks', sa.Column('content_tsv', postgresql.TSVECTOR(), nullable=True))
+    # Backfill existing rows; new rows are populated at ingest time
+    op.execute(
+        sa.text("UPDATE chunks SET content_tsv = to_tsvector(CAST(:cfg AS regconfig), content)")
+        .bindparams(cfg=settings.FTS_CONFIG)
+    )
+    op.create_index('ix_chunks_content_tsv', 'chunks', ['content_tsv'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chunks_content_tsv', table_name='chunks', postgresql_using='gin')
+    op.drop_column('chunks', 'content_tsv')
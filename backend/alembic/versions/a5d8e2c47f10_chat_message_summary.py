@@ -0,0 +1,27 @@
+"""chat message summary
+
+Revision ID: a5d8e2c47f10
+Revises: 7c2f9e4b1a38
+Create Date: 2026-10-18 17:58:21.364907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5d8e2c47f10'
+down_revision: Union[str, None] = '7c2f9e4b1a38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chat_messages', sa.Column('summary_until', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_chat_messages_session_id_created_at', 'chat_messages', ['session_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chat_messages_session_id_created_at', table_name='chat_messages')
+    op.drop_column('chat_messages', 'summary_until')
@@ -0,0 +1,25 @@
+"""corpus version sequence
+
+Revision ID: b9e4d2a6f815
+Revises: a5d8e2c47f10
+Create Date: 2026-10-18 19:42:07.518236
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e4d2a6f815'
+down_revision: Union[str, None] = 'a5d8e2c47f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('corpus_version_seq')))
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence('corpus_version_seq')))
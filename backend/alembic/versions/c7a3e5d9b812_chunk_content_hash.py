@@ -0,0 +1,38 @@
+"""chunk content hash
+
+Revision ID: c7a3e5d9b812
+Revises: 8d41f0a6c2b7
+Create Date: 2026-10-18 11:26:52.017433
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a3e5d9b812'
+down_revision: Union[str, None] = '8d41f0a6c2b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('chunks', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('chunks', sa.Column('embedding_model', sa.String(length=200), nullable=True))
+    # Existing vectors were produced by the currently configured model
+    op.execute(
+        sa.text(
+            "UPDATE chunks SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex'), "
+            "embedding_model = :model WHERE embedding IS NOT NULL"
+        ).bindparams(model=settings.EMBEDDING_MODEL)
+    )
+    op.create_index('ix_chunks_embedding_model_content_hash', 'chunks', ['embedding_model', 'content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chunks_embedding_model_content_hash', table_name='chunks')
+    op.drop_column('chunks', 'embedding_model')
+    op.drop_column('chunks', 'content_hash')
@@ -0,0 +1,38 @@
+"""ingestion jobs one active per document
+
+Revision ID: d3f7a1c9e824
+Revises: b9e4d2a6f815
+Create Date: 2026-10-18 21:16:42.305518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f7a1c9e824'
+down_revision: Union[str, None] = 'b9e4d2a6f815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Drop redundant active jobs, keeping a running one over a queued one
+    op.execute("""
+        DELETE FROM ingestion_jobs a
+        USING ingestion_jobs b
+        WHERE a.document_id = b.document_id
+          AND a.id <> b.id
+          AND a.status IN ('QUEUED', 'RUNNING')
+          AND b.status IN ('QUEUED', 'RUNNING')
+          AND (a.status, a.id) < (b.status, b.id)
+    """)
+    op.create_index(
+        'uq_ingestion_jobs_active_document', 'ingestion_jobs', ['document_id'], unique=True,
+        postgresql_where=sa.text("status IN ('QUEUED', 'RUNNING')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_ingestion_jobs_active_document', table_name='ingestion_jobs')
@@ -0,0 +1,28 @@
+"""document content hash
+
+Revision ID: f4c8a2b7e630
+Revises: e19b6f4a3d25
+Create Date: 2026-10-18 14:21:45.390127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c8a2b7e630'
+down_revision: Union[str, None] = 'e19b6f4a3d25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing documents keep a NULL hash; only new uploads take part in dedupe
+    op.add_column('documents', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_documents_content_hash', 'documents', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_documents_content_hash', table_name='documents')
+    op.drop_column('documents', 'content_hash')
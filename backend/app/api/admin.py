@@ -141,8 +141,8 @@ async def admin_health(db: AsyncSession = Depends(get_db)):
 
     # Ollama check
     try:
-        from app.services.llm.ollama import OllamaProvider
-        provider = OllamaProvider()
+        from app.services.llm.factory import get_llm_provider
+        provider = get_llm_provider("ollama")
         checks["ollama"] = "healthy" if await provider.health_check() else "unhealthy"
     except Exception:
         checks["ollama"] = "unhealthy"
@@ -156,3 +156,26 @@ async def admin_health(db: AsyncSession = Depends(get_db)):
         checks["embedding_model"] = "unhealthy"
 
     return checks
+
+
+@router.get("/health/metrics")
+async def admin_health_metrics():
+    from app.services.answer_cache import answer_cache
+    from app.services.embedding import embedding_service
+    from app.services.llm.scheduler import llm_scheduler
+    from app.services.progress import progress_broker
+    from app.services.result_cache import search_result_cache
+
+    return {
+        "embedding_cache": embedding_service.cache.stats(),
+        "embedding_lanes": {
+            "query": embedding_service.query_lane.stats(),
+            "ingest": embedding_service.ingest_lane.stats(),
+        },
+        "embedding_batcher": embedding_service.batcher.stats(),
+        "embedding_padding": embedding_service.padding_summary(),
+        "search_cache": search_result_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "ingest_progress": progress_broker.stats(),
+    }
@@ -14,11 +14,20 @@ from app.schemas.chat import (
     ChatSessionDetailResponse,
     ChatSessionResponse,
 )
-from app.services.chat import handle_message
+from app.services.answer_cache import answer_cache
+from app.services.chat import prepare_message, stream_reply
+from app.services.llm.scheduler import LLMQueueFull, LLMTicket, llm_scheduler
 
 router = APIRouter()
 
 
+def _admit(session: ChatSession) -> LLMTicket:
+    try:
+        return llm_scheduler.reserve(session.llm_provider, session.id)
+    except LLMQueueFull as e:
+        raise HTTPException(429, str(e), headers={"Retry-After": str(e.retry_after)})
+
+
 @router.post("/sessions", response_model=ChatSessionResponse)
 async def create_session(
     data: ChatSessionCreate,
@@ -80,10 +89,27 @@ async def send_message(
     if not session:
         raise HTTPException(404, "Session not found")
 
+    # Reject before the stream starts; once admitted the request waits its turn for a slot.
+    # Without the answer cache every turn needs the provider, so admission comes before any work;
+    # with it, a cache hit is served without a slot even when the queue is full.
+    ticket = None if answer_cache.enabled else _admit(session)
+    try:
+        turn = await prepare_message(db, session_id, data.content)
+    except BaseException:
+        if ticket is not None:
+            ticket.cancel()
+        raise
+    if ticket is None and turn["cached_tokens"] is None:
+        ticket = _admit(session)
+
     async def event_stream():
-        async for token in handle_message(db, session_id, data.content):
-            yield f"data: {token}\n\n"
-        yield "data: [DONE]\n\n"
+        try:
+            async for token in stream_reply(db, turn, ticket):
+                yield f"data: {token}\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            if ticket is not None:
+                ticket.cancel()
 
     return StreamingResponse(
         event_stream(),
@@ -1,16 +1,24 @@
+import asyncio
+import json
 import os
 import uuid
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import exists, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.config import settings
-from app.database import get_db
-from app.models.document import Document, DocumentStatus
+from app.database import async_session, get_db
+from app.models.document import Chunk, Document, DocumentStatus
+from app.models.job import ACTIVE_STATUSES, IngestionJob, JobStatus
 from app.schemas.document import DocumentDetailResponse, DocumentResponse
-from app.services.document_processor import process_document
+from app.services.chunk_store import release_canonicals
+from app.services.job_queue import enqueue_document
+from app.services.progress import iter_progress
+from app.services.result_cache import search_result_cache
+from app.utils.file_storage import stream_upload_to_disk
 
 router = APIRouter()
 
@@ -18,19 +26,40 @@ router = APIRouter()
 @router.post("/upload", response_model=list[DocumentResponse])
 async def upload_documents(
     files: list[UploadFile],
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
-    uploaded = []
     for file in files:
         ext = file.filename.rsplit(".", 1)[-1].lower() if file.filename else ""
         if ext not in ("txt", "pdf"):
             raise HTTPException(400, f"Unsupported file type: {ext}. Only .txt and .pdf are supported.")
 
+    uploaded = []
+    by_hash: dict[str, Document] = {}
+    for file in files:
+        ext = file.filename.rsplit(".", 1)[-1].lower() if file.filename else ""
+        tmp_path, content_hash, size = await stream_upload_to_disk(file, settings.UPLOAD_DIR)
+
+        # Identical content already in the corpus (or earlier in this batch)
+        # is linked to the existing document instead of being ingested again.
+        existing = by_hash.get(content_hash)
+        if existing is None:
+            result = await db.execute(
+                select(Document)
+                .where(Document.content_hash == content_hash, Document.status != DocumentStatus.FAILED)
+                .order_by(Document.created_at)
+                .limit(1)
+            )
+            existing = result.scalar_one_or_none()
+        if existing is not None:
+            await asyncio.to_thread(os.remove, tmp_path)
+            uploaded.append(existing)
+            continue
+
         doc = Document(
             filename=file.filename or "unnamed",
             file_type=ext,
-            file_size=file.size,
+            file_size=size,
+            content_hash=content_hash,
             status=DocumentStatus.PENDING,
         )
         db.add(doc)
@@ -38,14 +67,11 @@ async def upload_documents(
 
         doc_dir = os.path.join(settings.UPLOAD_DIR, str(doc.id))
         os.makedirs(doc_dir, exist_ok=True)
-        filepath = os.path.join(doc_dir, doc.filename)
-
-        content = await file.read()
-        with open(filepath, "wb") as f:
-            f.write(content)
+        await asyncio.to_thread(os.replace, tmp_path, os.path.join(doc_dir, doc.filename))
 
         uploaded.append(doc)
-        background_tasks.add_task(process_document, doc.id)
+        by_hash[content_hash] = doc
+        await enqueue_document(db, doc.id)
 
     await db.commit()
     for doc in uploaded:
@@ -64,6 +90,66 @@ async def list_documents(
     return result.scalars().all()
 
 
+async def _progress_snapshots(document_ids: list[uuid.UUID]) -> list[dict]:
+    # Stored state, for the initial snapshot and for documents processed in another process
+    active = exists().where(
+        IngestionJob.document_id == Document.id,
+        IngestionJob.status.in_(ACTIVE_STATUSES),
+    )
+    async with async_session() as db:
+        result = await db.execute(
+            select(Document.id, Document.status, Document.chunk_count, Document.error_message, active.label("active"))
+            .where(Document.id.in_(document_ids))
+        )
+        rows = result.all()
+
+    snapshots = []
+    for row in rows:
+        if row.active:
+            # A FAILED document with a queued job is waiting for a retry
+            stage = "processing" if row.status == DocumentStatus.PROCESSING else "queued"
+        else:
+            stage = row.status.value
+        event = {"document_id": str(row.id), "stage": stage, "chunk_count": row.chunk_count}
+        if stage == "failed":
+            event["error"] = row.error_message
+        snapshots.append(event)
+    return snapshots
+
+
+async def _progress_stream(document_ids: list[uuid.UUID]) -> StreamingResponse:
+    document_ids = list(dict.fromkeys(document_ids))
+    initial = {uuid.UUID(e["document_id"]): e for e in await _progress_snapshots(document_ids)}
+    missing = [str(i) for i in document_ids if i not in initial]
+    if missing:
+        raise HTTPException(404, f"Document not found: {', '.join(missing)}")
+
+    async def event_stream():
+        async for event in iter_progress(document_ids, initial, _progress_snapshots):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"data: {json.dumps(event)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Server-sent events until every listed document (e.g. one upload batch) completes or fails
+@router.get("/progress")
+async def stream_batch_progress(ids: list[uuid.UUID] = Query(...)):
+    return await _progress_stream(ids)
+
+
+@router.get("/{document_id}/progress")
+async def stream_document_progress(document_id: uuid.UUID):
+    return await _progress_stream([document_id])
+
+
 @router.get("/{document_id}", response_model=DocumentDetailResponse)
 async def get_document(
     document_id: uuid.UUID,
@@ -90,24 +176,81 @@ async def delete_document(
         import shutil
         shutil.rmtree(doc_dir)
 
+    await release_canonicals(db, Chunk.document_id == doc.id)
     await db.delete(doc)
     await db.commit()
+    await search_result_cache.bump_version()
     return {"message": "Document deleted"}
 
 
+# Swaps in new content under the same document; unchanged chunks keep their vectors
+# (INGEST_INCREMENTAL) and the progress stream's completed event reports the counts
+@router.put("/{document_id}/file", response_model=DocumentResponse)
+async def replace_document_file(
+    document_id: uuid.UUID,
+    file: UploadFile,
+    db: AsyncSession = Depends(get_db),
+):
+    ext = file.filename.rsplit(".", 1)[-1].lower() if file.filename else ""
+    if ext not in ("txt", "pdf"):
+        raise HTTPException(400, f"Unsupported file type: {ext}. Only .txt and .pdf are supported.")
+
+    tmp_path, content_hash, size = await stream_upload_to_disk(file, settings.UPLOAD_DIR)
+    try:
+        doc = await db.get(Document, document_id)
+        if not doc:
+            raise HTTPException(404, "Document not found")
+
+        # Locking a queued job keeps workers from claiming it until the new file is in place
+        result = await db.execute(
+            select(IngestionJob)
+            .where(IngestionJob.document_id == doc.id, IngestionJob.status.in_(ACTIVE_STATUSES))
+            .with_for_update()
+        )
+        active = result.scalars().first()
+        if active is not None and active.status == JobStatus.RUNNING:
+            raise HTTPException(409, "Document is being processed; replace it once processing finishes")
+    except HTTPException:
+        await asyncio.to_thread(os.remove, tmp_path)
+        raise
+
+    if content_hash == doc.content_hash and doc.status != DocumentStatus.FAILED:
+        await asyncio.to_thread(os.remove, tmp_path)
+        return doc
+
+    doc_dir = os.path.join(settings.UPLOAD_DIR, str(doc.id))
+    os.makedirs(doc_dir, exist_ok=True)
+    old_path = os.path.join(doc_dir, doc.filename)
+    filename = file.filename or "unnamed"
+    await asyncio.to_thread(os.replace, tmp_path, os.path.join(doc_dir, filename))
+    if filename != doc.filename and os.path.exists(old_path):
+        await asyncio.to_thread(os.remove, old_path)
+
+    doc.filename = filename
+    doc.file_type = ext
+    doc.file_size = size
+    doc.content_hash = content_hash
+    doc.status = DocumentStatus.PENDING
+    doc.error_message = None
+    await enqueue_document(db, doc.id)
+    await db.commit()
+    await db.refresh(doc)
+    return doc
+
+
 @router.post("/{document_id}/reprocess", response_model=DocumentResponse)
 async def reprocess_document(
     document_id: uuid.UUID,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     doc = await db.get(Document, document_id)
     if not doc:
         raise HTTPException(404, "Document not found")
 
-    doc.status = DocumentStatus.PENDING
+    # A running job keeps its status; a queued one will pick up this request
+    job = await enqueue_document(db, doc.id)
+    if job.status == JobStatus.QUEUED:
+        doc.status = DocumentStatus.PENDING
     await db.commit()
     await db.refresh(doc)
-
-    background_tasks.add_task(process_document, doc.id)
     return doc
@@ -1,9 +1,11 @@
+import time
+
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.schemas.search import SearchRequest, SearchResponse
-from app.services.search import vector_search
+from app.services.search import hybrid_search, lexical_search, vector_search
 
 router = APIRouter()
 
@@ -13,9 +15,34 @@ async def search(
     request: SearchRequest,
     db: AsyncSession = Depends(get_db),
 ):
-    results = await vector_search(db, request.query, request.top_k, request.threshold)
+    start = time.perf_counter()
+    if request.mode == "hybrid":
+        results, timings = await hybrid_search(
+            request.query,
+            request.top_k,
+            request.threshold,
+            ef_search=request.ef_search,
+            probes=request.probes,
+        )
+    elif request.mode == "lexical":
+        results = await lexical_search(db, request.query, request.top_k)
+        timings = {"lexical_ms": round((time.perf_counter() - start) * 1000, 2)}
+    else:
+        results = await vector_search(
+            db,
+            request.query,
+            request.top_k,
+            request.threshold,
+            ef_search=request.ef_search,
+            probes=request.probes,
+        )
+        timings = {"vector_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    timings.setdefault("total_ms", round((time.perf_counter() - start) * 1000, 2))
     return SearchResponse(
         query=request.query,
+        mode=request.mode,
         results=results,
         total=len(results),
+        timings=timings,
     )
@@ -0,0 +1,397 @@
+"""Bulk ingestion of a directory tree or a tar/zip archive.
+
+Usage: python -m app.bulk_ingest SOURCE [--workers N] [--manifest FILE]
+
+Extraction, chunking and embedding run in worker processes; the parent
+process owns the database and writes chunks through the bulk COPY path.
+Every finished file is appended to a JSONL manifest, so rerunning the same
+command after an interruption skips what is already done.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tarfile
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import IO, Callable, Iterator
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session, engine
+from app.models.document import Document, DocumentStatus
+from app.services.chunk_embeddings import content_hash
+from app.services.chunk_store import delete_chunks, insert_chunks
+from app.services.result_cache import search_result_cache
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_TYPES = ("txt", "pdf")
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+# --- Worker processes ---
+
+def _init_worker():
+    from app.services.embedding import embedding_service
+
+    # Each worker is already one of N processes; extract PDFs inline
+    settings.PDF_EXTRACT_WORKERS = 1
+    embedding_service.load_model()
+
+
+def _prepare_document(filepath: str, file_type: str) -> tuple[list[tuple], np.ndarray]:
+    """Extract, chunk and embed one stored file; runs in a worker process."""
+    from app.services.document_processor import _chunk_counter
+    from app.services.embedding import embedding_service
+    from app.utils.chunking import chunk_pages, with_sizes
+    from app.utils.text_extraction import iter_pages
+
+    counter = _chunk_counter()
+    chunks = list(with_sizes(
+        chunk_pages(
+            iter_pages(filepath, file_type),
+            settings.CHUNK_SIZE,
+            settings.CHUNK_OVERLAP,
+            count_tokens=counter,
+        ),
+        counter,
+    ))
+    if not chunks:
+        return [], np.empty((0, settings.EMBEDDING_DIMENSION), dtype=np.float32)
+
+    hashes = [content_hash(content) for content, _, _, _ in chunks]
+    # Identical chunks within a document are embedded once
+    unique = list(dict.fromkeys(zip(hashes, (content for content, _, _, _ in chunks))))
+    vectors = dict(zip(
+        (digest for digest, _ in unique),
+        embedding_service.embed_batch([content for _, content in unique]),
+    ))
+    embeddings = np.asarray([vectors[digest] for digest in hashes], dtype=np.float32)
+    rows = [
+        (content, page_start, page_end, token_count, digest)
+        for (content, page_start, page_end, token_count), digest in zip(chunks, hashes)
+    ]
+    return rows, embeddings
+
+
+def _embedding_model_id() -> str:
+    from app.services.embedding import embedding_service
+
+    return embedding_service.model_id
+
+
+# --- Sources ---
+
+def _staging_path() -> str:
+    return os.path.join(settings.UPLOAD_DIR, ".bulk", uuid.uuid4().hex)
+
+
+def _copy_to(opener: Callable[[], IO[bytes]], path: str) -> tuple[str, int]:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    with opener() as src, open(path, "wb") as dst:
+        while block := src.read(COPY_BUFFER_SIZE):
+            digest.update(block)
+            size += len(block)
+            dst.write(block)
+    return digest.hexdigest(), size
+
+
+def _move_to(staged: str, digest: str, size: int, path: str) -> tuple[str, int]:
+    os.replace(staged, path)
+    return digest, size
+
+
+def _iter_sources(source: str, skip: Callable[[str], bool]) -> Iterator[tuple[str, Callable[[str], tuple[str, int]]]]:
+    """Yield (relative name, stage) for every supported file in a directory or archive.
+
+    ``stage(path)`` writes the file to ``path`` and returns its (sha256, size);
+    it may run on any thread. Names for which ``skip`` is true are not yielded.
+    """
+    def wanted(name: str) -> bool:
+        return name.rsplit(".", 1)[-1].lower() in SUPPORTED_TYPES and not skip(name)
+
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                if wanted(os.path.relpath(path, source)):
+                    yield os.path.relpath(path, source), partial(_copy_to, lambda path=path: open(path, "rb"))
+    elif zipfile.is_zipfile(source):
+        # ZipFile serializes reads of the shared file, so members can be copied concurrently
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and wanted(info.filename):
+                    yield info.filename, partial(_copy_to, lambda info=info: archive.open(info))
+    elif tarfile.is_tarfile(source):
+        # Tar members share one unlocked (often compressed) stream: read them strictly in order,
+        # here on the iterating thread, staging each to disk before it is handed out
+        with tarfile.open(source, "r|*") as archive:
+            for member in archive:
+                if member.isfile() and wanted(member.name):
+                    staged = _staging_path()
+                    digest, size = _copy_to(lambda member=member: archive.extractfile(member), staged)
+                    yield member.name, partial(_move_to, staged, digest, size)
+    else:
+        raise ValueError(f"{source} is not a directory, zip or tar archive")
+
+
+# --- Manifest ---
+
+def _load_manifest(path: str) -> set[str]:
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn final line from an interrupted run
+                if entry.get("status") in ("completed", "duplicate", "empty"):
+                    done.add(entry["source"])
+    return done
+
+
+class _Manifest:
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, **entry):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+# --- Orchestration ---
+
+class BulkIngest:
+    def __init__(self, source: str, workers: int, manifest_path: str):
+        self.source = source
+        self.workers = workers
+        self.manifest_path = manifest_path
+        self.docs = 0
+        self.chunks = 0
+        self.skipped = 0
+        self.resumed = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+        # Content claimed in this run, resolved to whether it was ingested
+        self._claimed: dict[str, asyncio.Future] = {}
+
+    async def _claim_document(self, name: str, stage) -> tuple[Document | None, str]:
+        """Store the file and return its Document, or None if identical content is already ingested.
+
+        A copy of content claimed earlier in this run waits for that claim and
+        only takes over if it failed. The caller settles the claim.
+        """
+        staging = _staging_path()
+        digest, size = await asyncio.to_thread(stage, staging)
+
+        while (claim := self._claimed.get(digest)) is not None:
+            if await claim:
+                await asyncio.to_thread(os.remove, staging)
+                return None, digest
+        self._claimed[digest] = asyncio.get_running_loop().create_future()
+
+        try:
+            async with async_session() as db:
+                result = await db.execute(select(Document).where(Document.content_hash == digest))
+                existing = result.scalars().all()
+                ingested = any(d.status == DocumentStatus.COMPLETED for d in existing)
+                if not ingested:
+                    doc = await self._resume_or_create(db, name, size, digest, existing)
+
+            if not ingested:
+                doc_dir = os.path.join(settings.UPLOAD_DIR, str(doc.id))
+                os.makedirs(doc_dir, exist_ok=True)
+                await asyncio.to_thread(os.replace, staging, os.path.join(doc_dir, doc.filename))
+        except Exception:
+            self._settle(digest, False)
+            raise
+
+        if ingested:
+            self._settle(digest, True)
+            await asyncio.to_thread(os.remove, staging)
+            return None, digest
+        return doc, digest
+
+    async def _resume_or_create(self, db: AsyncSession, name: str, size: int, digest: str, existing: list[Document]) -> Document:
+        # Resume a document left PROCESSING by an interrupted run instead of duplicating it;
+        # copies within this run never get here while an earlier one is in flight
+        unfinished = [d for d in existing if d.status == DocumentStatus.PROCESSING]
+        doc = unfinished[0] if unfinished else None
+        if doc is None:
+            filename = os.path.basename(name)
+            doc = Document(
+                filename=filename,
+                file_type=filename.rsplit(".", 1)[-1].lower(),
+                file_size=size,
+                content_hash=digest,
+            )
+            db.add(doc)
+        doc.status = DocumentStatus.PROCESSING
+        await db.commit()
+        return doc
+
+    def _settle(self, digest: str, ingested: bool):
+        claim = self._claimed[digest]
+        if not ingested:
+            # Let a later copy of the same content try again
+            del self._claimed[digest]
+        claim.set_result(ingested)
+
+    async def _store(self, doc: Document, rows: list[tuple], embeddings: np.ndarray, model_id: str):
+        async with async_session() as db:
+            await delete_chunks(db, doc.id)
+            await insert_chunks(db, doc.id, [
+                {
+                    "document_id": doc.id,
+                    "chunk_index": i,
+                    "content": content,
+                    "token_count": token_count,
+                    "page_start": page_start,
+                    "page_end": page_end,
+                    "embedding": embedding,
+                    "content_hash": digest,
+                    "embedding_model": model_id,
+                }
+                for i, ((content, page_start, page_end, token_count, digest), embedding) in enumerate(zip(rows, embeddings))
+            ])
+            stored = await db.get(Document, doc.id)
+            stored.status = DocumentStatus.COMPLETED if rows else DocumentStatus.FAILED
+            stored.chunk_count = len(rows)
+            stored.error_message = None if rows else "No text content extracted from file"
+            await db.commit()
+
+    async def _mark_failed(self, doc: Document, error: str):
+        async with async_session() as db:
+            stored = await db.get(Document, doc.id)
+            if stored:
+                stored.status = DocumentStatus.FAILED
+                stored.error_message = error
+                await db.commit()
+
+    async def _ingest_one(self, pool, manifest: _Manifest, model_id: str, name: str, stage, slots: asyncio.Semaphore):
+        try:
+            doc, digest = await self._claim_document(name, stage)
+            if doc is None:
+                self.skipped += 1
+                manifest.record(source=name, status="duplicate", sha256=digest)
+                return
+
+            loop = asyncio.get_running_loop()
+            filepath = os.path.join(settings.UPLOAD_DIR, str(doc.id), doc.filename)
+            try:
+                rows, embeddings = await loop.run_in_executor(pool, _prepare_document, filepath, doc.file_type)
+                await self._store(doc, rows, embeddings, model_id)
+            except Exception as e:
+                try:
+                    await self._mark_failed(doc, str(e))
+                finally:
+                    self._settle(digest, False)
+                raise
+            self._settle(digest, True)
+
+            self.docs += 1
+            self.chunks += len(rows)
+            manifest.record(
+                source=name,
+                status="completed" if rows else "empty",
+                sha256=digest,
+                document_id=str(doc.id),
+                chunks=len(rows),
+            )
+        except Exception as e:
+            logger.exception(f"Failed to ingest {name}")
+            self.failed += 1
+            manifest.record(source=name, status="failed", error=str(e))
+        finally:
+            slots.release()
+            self._report()
+
+    def _report(self, final: bool = False):
+        now = time.perf_counter()
+        if not final and now - self._last_report < 5:
+            return
+        self._last_report = now
+        elapsed = now - self.started
+        print(
+            f"{'done' if final else 'progress'}: {self.docs} docs, {self.chunks} chunks, "
+            f"{self.skipped + self.resumed} skipped, {self.failed} failed in {elapsed:.1f}s "
+            f"({self.docs / elapsed:.2f} docs/s, {self.chunks / elapsed:.1f} chunks/s)",
+            flush=True,
+        )
+
+    async def run(self):
+        done = _load_manifest(self.manifest_path)
+        manifest = _Manifest(self.manifest_path)
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        loop = asyncio.get_running_loop()
+        model_id = await loop.run_in_executor(pool, _embedding_model_id)
+
+        # Keep every worker busy plus one file staged ahead for each
+        slots = asyncio.Semaphore(self.workers * 2)
+        tasks = set()
+        try:
+            def skip(name: str) -> bool:
+                # Runs on the iterating thread; counted apart from the event loop's counters
+                if name in done:
+                    self.resumed += 1
+                    return True
+                return False
+
+            sources = _iter_sources(self.source, skip)
+            while True:
+                await slots.acquire()
+                item = await asyncio.to_thread(next, sources, None)
+                if item is None:
+                    slots.release()
+                    break
+                name, stage = item
+                task = asyncio.create_task(self._ingest_one(pool, manifest, model_id, name, stage, slots))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            pool.shutdown(cancel_futures=True)
+            manifest.close()
+            if self.docs:
+                await search_result_cache.bump_version()
+            await engine.dispose()
+        self._report(final=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest a directory or tar/zip archive into LocalRAG")
+    parser.add_argument("source", help="directory, .zip or .tar[.gz|.bz2|.xz]")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--manifest", help="resume manifest (default: SOURCE.manifest.jsonl)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    manifest = args.manifest or os.path.abspath(args.source).rstrip(os.sep) + ".manifest.jsonl"
+    asyncio.run(BulkIngest(args.source, args.workers, manifest).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -8,20 +8,134 @@ class Settings(BaseSettings):
 
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
     EMBEDDING_DIMENSION: int = 384
+    # "torch" or "onnx"; ONNX needs the optional 'onnx' extra
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_ONNX_QUANTIZE: bool = True
+    EMBEDDING_ONNX_QUANTIZATION_CONFIG: str = "avx2"
+    EMBEDDING_ONNX_CACHE_DIR: str = "./onnx_models"
+    # Minimum cosine agreement with PyTorch vectors required to start a non-torch backend; 0 skips the check
+    EMBEDDING_PARITY_THRESHOLD: float = 0.98
+    # Query-embedding cache; TTL in seconds, 0 disables expiry
+    EMBEDDING_CACHE_SIZE: int = 4096
+    EMBEDDING_CACHE_TTL: float = 3600
+    # Executor lanes keeping model calls off the event loop; interactive
+    # queries never wait behind ingest batches
+    EMBEDDING_QUERY_WORKERS: int = 1
+    EMBEDDING_QUERY_QUEUE_SIZE: int = 64
+    EMBEDDING_INGEST_WORKERS: int = 1
+    EMBEDDING_INGEST_QUEUE_SIZE: int = 4
+    # Micro-batching of concurrent query embeddings
+    EMBEDDING_MICRO_BATCHING: bool = True
+    EMBEDDING_BATCH_WINDOW_MS: float = 3.0
+    EMBEDDING_MAX_BATCH_SIZE: int = 32
+    # Ingest batches are formed by padded token count rather than chunk count
+    EMBEDDING_BATCH_TOKEN_BUDGET: int = 16384
+    # Optional SQLite file caching chunk vectors by content hash; empty disables it
+    EMBEDDING_DISK_CACHE_PATH: str = ""
 
     CHUNK_SIZE: int = 512
     CHUNK_OVERLAP: int = 50
+    # "words" (whitespace) or "tokens" (embedding model tokenizer) for CHUNK_SIZE/CHUNK_OVERLAP
+    CHUNK_COUNT_MODE: str = "words"
+    # PDF pages are extracted in ranges on a process pool while chunks stream into embedding
+    PDF_EXTRACT_WORKERS: int = 4
+    PDF_PAGES_PER_TASK: int = 16
+    # Text files are decoded in blocks; encoding detection only looks at a bounded sample
+    TEXT_DECODE_BLOCK_SIZE: int = 1024 * 1024
+    TEXT_DETECT_SAMPLE_SIZE: int = 64 * 1024
+    INGEST_EMBED_BATCH_SIZE: int = 256
+    # Reprocessing keeps stored chunks whose content is unchanged instead of rewriting them all
+    INGEST_INCREMENTAL: bool = True
+    # Near-duplicate chunks (estimated Jaccard over word 3-grams) are stored as references, not embedded
+    NEAR_DUP_ENABLED: bool = False
+    NEAR_DUP_THRESHOLD: float = 0.9
+    NEAR_DUP_NUM_PERM: int = 128
+    # Chunk persistence: "copy" (binary COPY) or "executemany" (batched INSERTs)
+    CHUNK_WRITE_METHOD: str = "copy"
+    CHUNK_WRITE_BATCH_SIZE: int = 1000
 
     DEFAULT_TOP_K: int = 5
     SIMILARITY_THRESHOLD: float = 0.3
 
+    # Approximate-nearest-neighbour index on chunks.embedding: "hnsw", "ivfflat" or "none"
+    VECTOR_INDEX_TYPE: str = "hnsw"
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 64
+    HNSW_EF_SEARCH: int = 40
+    IVFFLAT_LISTS: int = 100
+    IVFFLAT_PROBES: int = 10
+
+    # Lexical (full-text) retrieval and reciprocal-rank fusion
+    FTS_CONFIG: str = "english"
+    RRF_K: int = 60
+    HYBRID_CANDIDATES: int = 50
+    CHAT_RETRIEVAL_MODE: str = "vector"
+    # Chat prompts are packed to a token budget from this many retrieved chunks and past messages
+    CHAT_CONTEXT_CANDIDATES: int = 20
+    CHAT_HISTORY_CANDIDATES: int = 20
+    # Share of the budget (after system prompt and question) history may claim before chunks are packed
+    CHAT_HISTORY_MAX_SHARE: float = 0.3
+    # Once unsummarized history passes the trigger, older turns are summarized in the background,
+    # keeping roughly CHAT_SUMMARY_KEEP_TOKENS of recent turns verbatim
+    CHAT_SUMMARY_ENABLED: bool = True
+    CHAT_SUMMARY_TRIGGER_TOKENS: int = 2000
+    CHAT_SUMMARY_KEEP_TOKENS: int = 800
+    # Opt-in per-worker answer cache: a question whose embedding is this similar to a cached one,
+    # asked with the same persona, model, retrieved chunks, history and corpus version, replays its answer.
+    # Needs SEARCH_CACHE_BACKEND other than "none", which provides the corpus version
+    ANSWER_CACHE_ENABLED: bool = False
+    ANSWER_CACHE_SIMILARITY: float = 0.95
+    ANSWER_CACHE_SIZE: int = 1024
+    ANSWER_CACHE_TTL: float = 3600
+
+    # Search result cache: "memory" (per worker), "redis" (shared), "local" (shared stand-in) or "none";
+    # memory and local read the corpus version from Postgres so out-of-process ingests invalidate them
+    SEARCH_CACHE_BACKEND: str = "memory"
+    SEARCH_CACHE_SIZE: int = 1024
+    SEARCH_CACHE_TTL: float = 300
+    SEARCH_CACHE_URL: str = "redis://localhost:6379/0"
+    # Seconds a worker reuses the Postgres corpus version before reading it again; 0 reads it per lookup
+    SEARCH_CACHE_VERSION_TTL: float = 1.0
+
+    # Ingestion job queue; the API process runs an embedded worker unless
+    # INGEST_EMBEDDED_WORKER_CONCURRENCY is 0 (use `python -m app.worker` instead)
+    INGEST_WORKER_CONCURRENCY: int = 2
+    INGEST_EMBEDDED_WORKER_CONCURRENCY: int = 1
+    INGEST_JOB_MAX_ATTEMPTS: int = 3
+    INGEST_JOB_LEASE_SECONDS: int = 300
+    INGEST_JOB_RETRY_BACKOFF_SECONDS: float = 10
+    INGEST_WORKER_POLL_SECONDS: float = 2
+    # Progress SSE: per-subscriber event buffer, and how often idle streams re-check the database
+    INGEST_PROGRESS_QUEUE_SIZE: int = 64
+    INGEST_PROGRESS_POLL_SECONDS: float = 5
+
+    # Shared, long-lived HTTP clients for LLM providers (HTTP/2 needs the "http2" extra and TLS)
+    LLM_POOL_MAX_CONNECTIONS: int = 20
+    LLM_POOL_MAX_KEEPALIVE: int = 10
+    LLM_KEEPALIVE_EXPIRY: float = 60
+    LLM_HTTP2: bool = True
+    LLM_CONNECT_TIMEOUT: float = 10
+    LLM_READ_TIMEOUT: float = 300
+    # Admitted LLM requests waiting for a generation slot, per provider; beyond it chat gets 429 + Retry-After
+    LLM_QUEUE_SIZE: int = 32
+
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "llama3.2"
+    # Hugging Face tokenizer matching OLLAMA_MODEL; empty estimates 4 characters per token
+    OLLAMA_TOKENIZER: str = ""
+    # Prompt token budget; keep it below the model's context window minus room for the answer
+    OLLAMA_PROMPT_TOKEN_BUDGET: int = 4096
+    # Concurrent generations; a local Ollama slows every stream down when oversubscribed
+    OLLAMA_MAX_CONCURRENCY: int = 2
 
     AZURE_OPENAI_ENDPOINT: str = ""
     AZURE_OPENAI_API_KEY: str = ""
     AZURE_OPENAI_DEPLOYMENT: str = ""
     AZURE_OPENAI_API_VERSION: str = "2024-02-15-preview"
+    # tiktoken encoding (needs the "tiktoken" extra)
+    AZURE_OPENAI_TOKENIZER: str = "o200k_base"
+    AZURE_OPENAI_PROMPT_TOKEN_BUDGET: int = 16000
+    AZURE_OPENAI_MAX_CONCURRENCY: int = 16
 
     CORS_ORIGINS: list[str] = ["http://localhost:5173"]
 
@@ -1,3 +1,4 @@
+import asyncio
 import os
 from contextlib import asynccontextmanager
 
@@ -14,8 +15,29 @@ async def lifespan(app: FastAPI):
     # Load embedding model at startup
     from app.services.embedding import embedding_service
     embedding_service.load_model()
+
+    from app.services.llm.factory import llm_registry
+    llm_registry.open()
+
+    worker_stop = asyncio.Event()
+    worker_task = None
+    if settings.INGEST_EMBEDDED_WORKER_CONCURRENCY > 0:
+        from app.services.ingest_worker import IngestWorker
+        worker = IngestWorker(settings.INGEST_EMBEDDED_WORKER_CONCURRENCY)
+        worker_task = asyncio.create_task(worker.run(worker_stop))
+
     yield
 
+    worker_stop.set()
+    if worker_task is not None:
+        await worker_task
+    from app.services.chat_summary import shutdown_compactions
+    await shutdown_compactions()
+    await llm_registry.aclose()
+    embedding_service.shutdown()
+    from app.utils.text_extraction import shutdown_pdf_pool
+    shutdown_pdf_pool()
+
 
 app = FastAPI(
     title="LocalRAG",
@@ -1,11 +1,13 @@
 from app.models.document import Document, Chunk, DocumentStatus
 from app.models.chat import ChatSession, ChatMessage
+from app.models.job import IngestionJob, JobStatus
 from app.models.persona import Persona
 from app.models.settings import SystemSetting
 
 __all__ = [
     "Document", "Chunk", "DocumentStatus",
     "ChatSession", "ChatMessage",
+    "IngestionJob", "JobStatus",
     "Persona",
     "SystemSetting",
 ]
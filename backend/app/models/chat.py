@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, String, Text, func
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String, Text, func
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 
@@ -29,6 +29,13 @@ class ChatMessage(Base):
     role = Column(String(20), nullable=False)
     content = Column(Text, nullable=False)
     context_chunks = Column(JSONB, nullable=True)
+    # Per-stage latencies and time to first token (ms), recorded on assistant messages
+    timings = Column(JSONB, nullable=True)
+    # Set on role="summary" messages: the summary covers every message created up to this time
+    summary_until = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     session = relationship("ChatSession", back_populates="messages")
+
+
+Index("ix_chat_messages_session_id_created_at", ChatMessage.session_id, ChatMessage.created_at)
@@ -1,11 +1,12 @@
 import enum
 import uuid
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String, Text, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, Column, DateTime, Enum, ForeignKey, Index, Integer, LargeBinary, Sequence, String, Text, func
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, UUID
 from sqlalchemy.orm import relationship
 from pgvector.sqlalchemy import Vector
 
+from app.config import settings
 from app.database import Base
 
 
@@ -23,6 +24,7 @@ class Document(Base):
     filename = Column(String(500), nullable=False)
     file_type = Column(String(10), nullable=False)
     file_size = Column(Integer)
+    content_hash = Column(String(64), nullable=True, index=True)
     status = Column(Enum(DocumentStatus), default=DocumentStatus.PENDING)
     chunk_count = Column(Integer, default=0)
     error_message = Column(Text, nullable=True)
@@ -36,11 +38,46 @@ class Chunk(Base):
     __tablename__ = "chunks"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
     chunk_index = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
     token_count = Column(Integer)
+    page_start = Column(Integer, nullable=True)
+    page_end = Column(Integer, nullable=True)
     embedding = Column(Vector(384))
+    content_tsv = Column(TSVECTOR)
+    content_hash = Column(String(64), nullable=True)
+    embedding_model = Column(String(200), nullable=True)
+    # Near-duplicates keep their content but no embedding; they point at the chunk that has one
+    canonical_chunk_id = Column(UUID(as_uuid=True), ForeignKey("chunks.id", ondelete="SET NULL"), nullable=True, index=True)
+    minhash = Column(LargeBinary, nullable=True)
+    lsh_bands = Column(ARRAY(BigInteger), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     document = relationship("Document", back_populates="chunks")
+
+
+Index("ix_chunks_content_tsv", Chunk.content_tsv, postgresql_using="gin")
+Index("ix_chunks_embedding_model_content_hash", Chunk.embedding_model, Chunk.content_hash)
+Index("ix_chunks_lsh_bands", Chunk.lsh_bands, postgresql_using="gin")
+
+# Corpus version for the search result cache; a sequence so every process sees a bump at once
+corpus_version_seq = Sequence("corpus_version_seq", metadata=Base.metadata)
+
+# ANN index over chunk embeddings; mirrors the one created by the vector-index migration
+if settings.VECTOR_INDEX_TYPE == "hnsw":
+    Index(
+        "ix_chunks_embedding_hnsw",
+        Chunk.embedding,
+        postgresql_using="hnsw",
+        postgresql_with={"m": settings.HNSW_M, "ef_construction": settings.HNSW_EF_CONSTRUCTION},
+        postgresql_ops={"embedding": "vector_cosine_ops"},
+    )
+elif settings.VECTOR_INDEX_TYPE == "ivfflat":
+    Index(
+        "ix_chunks_embedding_ivfflat",
+        Chunk.embedding,
+        postgresql_using="ivfflat",
+        postgresql_with={"lists": settings.IVFFLAT_LISTS},
+        postgresql_ops={"embedding": "vector_cosine_ops"},
+    )
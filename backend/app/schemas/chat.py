@@ -31,6 +31,8 @@ class ChatMessageResponse(BaseModel):
     role: str
     content: str
     context_chunks: list | None = None
+    timings: dict | None = None
+    summary_until: datetime | None = None
     created_at: datetime
 
     model_config = {"from_attributes": True}
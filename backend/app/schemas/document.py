@@ -11,6 +11,8 @@ class ChunkResponse(BaseModel):
     chunk_index: int
     content: str
     token_count: int | None = None
+    page_start: int | None = None
+    page_end: int | None = None
     created_at: datetime
 
     model_config = {"from_attributes": True}
@@ -21,6 +23,7 @@ class DocumentResponse(BaseModel):
     filename: str
     file_type: str
     file_size: int | None = None
+    content_hash: str | None = None
     status: DocumentStatus
     chunk_count: int
     error_message: str | None = None
@@ -1,3 +1,4 @@
+from typing import Literal
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -5,8 +6,19 @@ from pydantic import BaseModel, Field
 
 class SearchRequest(BaseModel):
     query: str
+    mode: Literal["vector", "lexical", "hybrid"] = "vector"
     top_k: int = Field(default=5, ge=1, le=50)
     threshold: float = Field(default=0.3, ge=0.0, le=1.0)
+    # Per-query ANN recall knobs; None falls back to the configured defaults
+    ef_search: int | None = Field(default=None, ge=1, le=1000)
+    probes: int | None = Field(default=None, ge=1, le=10000)
+
+
+class DuplicateSource(BaseModel):
+    chunk_id: UUID
+    document_id: UUID
+    filename: str
+    chunk_index: int
 
 
 class SearchResultItem(BaseModel):
@@ -16,11 +28,15 @@ class SearchResultItem(BaseModel):
     chunk_index: int
     content: str
     score: float
+    # Near-duplicate chunks that were stored as references to this one at ingest
+    duplicates: list[DuplicateSource] = []
 
     model_config = {"from_attributes": True}
 
 
 class SearchResponse(BaseModel):
     query: str
+    mode: str = "vector"
     results: list[SearchResultItem]
     total: int
+    timings: dict[str, float] = {}
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import logging
+import threading
+
+import numpy as np
+
+from app.config import settings
+from app.services.result_cache import search_result_cache
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Similar questions asked against one context are few; keep the newest
+MAX_ENTRIES_PER_CONTEXT = 16
+
+
+def _model_name(provider_name: str) -> str:
+    if provider_name == "azure_openai":
+        return settings.AZURE_OPENAI_DEPLOYMENT
+    return settings.OLLAMA_MODEL
+
+
+def _unit(embedding: list[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class AnswerCache:
+    """Semantic cache of chat answers, per worker process.
+
+    Answers are grouped under an exact context key: system prompt (persona),
+    provider and model, the chunk ids packed into the prompt, the summary and
+    history sent with it, and the corpus version. Within a context, an answer
+    is reused when its question embedding is within the similarity threshold
+    of the new one. The token sequence is stored as streamed so a hit replays
+    the same stream.
+    """
+
+    def __init__(self, max_size: int, ttl: float, threshold: float):
+        self.threshold = threshold
+        self._contexts = TTLCache(max_size, ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if settings.ANSWER_CACHE_ENABLED and not search_result_cache.enabled:
+            logger.warning("ANSWER_CACHE_ENABLED needs a search cache backend for the corpus version; answer cache disabled")
+
+    @property
+    def enabled(self) -> bool:
+        # Without the versioned search cache nothing would invalidate answers after an ingest
+        return settings.ANSWER_CACHE_ENABLED and search_result_cache.enabled
+
+    async def context_key(
+        self,
+        provider_name: str,
+        system_prompt: str,
+        chunk_ids: list[str],
+        history: list[dict],
+        summary: str | None = None,
+    ) -> str | None:
+        """Exact part of the cache key; None if the corpus version is unavailable and caching must be skipped."""
+        try:
+            version = await search_result_cache.get_version()
+        except Exception:
+            logger.warning("Corpus version unavailable; skipping answer cache", exc_info=True)
+            return None
+        payload = json.dumps(
+            {
+                "system": system_prompt,
+                "provider": provider_name,
+                "model": _model_name(provider_name),
+                "chunks": sorted(chunk_ids),
+                "summary": summary,
+                "history": history,
+                "version": version,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, context_key: str, embedding: list[float]) -> list[str] | None:
+        query = _unit(embedding)
+        best, best_score = None, self.threshold
+        for vector, tokens in self._contexts.get(context_key) or []:
+            score = float(vector @ query)
+            if score >= best_score:
+                best, best_score = tokens, score
+        with self._lock:
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return best
+
+    def set(self, context_key: str, embedding: list[float], tokens: list[str]) -> None:
+        with self._lock:
+            entries = list(self._contexts.get(context_key) or [])
+            entries.append((_unit(embedding), tokens))
+            self._contexts.set(context_key, entries[-MAX_ENTRIES_PER_CONTEXT:])
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "contexts": self._contexts.stats()["size"],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+answer_cache = AnswerCache(
+    settings.ANSWER_CACHE_SIZE,
+    settings.ANSWER_CACHE_TTL,
+    settings.ANSWER_CACHE_SIMILARITY,
+)
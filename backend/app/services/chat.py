@@ -1,15 +1,24 @@
+import asyncio
+import contextlib
 import logging
+import time
 from typing import AsyncIterator
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.config import settings
+from app.database import async_session
 from app.models.chat import ChatMessage, ChatSession
-from app.models.persona import Persona
+from app.services.answer_cache import answer_cache
+from app.services.chat_summary import latest_summary, schedule_compaction
+from app.services.context_assembler import assemble_prompt
+from app.services.embedding import embedding_service
 from app.services.llm.factory import get_llm_provider
-from app.services.search import vector_search
+from app.services.llm.scheduler import LLMTicket, llm_scheduler
+from app.services.search import hybrid_search, vector_search
 
 logger = logging.getLogger(__name__)
 
@@ -17,80 +26,194 @@ DEFAULT_SYSTEM_PROMPT = """You are a helpful knowledge assistant. Answer questio
 If the context doesn't contain relevant information, say so honestly.
 Always cite which sources you're drawing from when possible."""
 
-MAX_HISTORY_MESSAGES = 4
-MAX_CONTEXT_CHUNKS = 1
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
 
 
-async def handle_message(
-    db: AsyncSession,
-    session_id: UUID,
-    user_content: str,
-) -> AsyncIterator[str]:
-    """Handle a user message: RAG search, context assembly, LLM streaming."""
-    session = await db.get(
-        ChatSession, session_id, options=[selectinload(ChatSession.persona)]
-    )
+async def _timed(name: str, timings: dict, coro):
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[f"{name}_ms"] = _ms(start)
+
+
+async def _load_session(db: AsyncSession, session_id: UUID) -> ChatSession:
+    session = await db.get(ChatSession, session_id, options=[selectinload(ChatSession.persona)])
     if not session:
         raise ValueError(f"Session {session_id} not found")
+    return session
+
+
+async def _load_history(session_id: UUID, exclude_id: UUID) -> tuple[ChatMessage | None, list[ChatMessage]]:
+    """Latest conversation summary and the turns after it, oldest first."""
+    async with async_session() as db:
+        summary = await latest_summary(db, session_id)
+        # Excludes the current turn's user message by id, whenever its write lands
+        stmt = (
+            select(ChatMessage)
+            .where(
+                ChatMessage.session_id == session_id,
+                ChatMessage.id != exclude_id,
+                ChatMessage.role.in_(("user", "assistant")),
+            )
+            .order_by(ChatMessage.created_at.desc())
+            .limit(settings.CHAT_HISTORY_CANDIDATES)
+        )
+        if summary is not None:
+            stmt = stmt.where(ChatMessage.created_at > summary.summary_until)
+        result = await db.execute(stmt)
+        return summary, list(reversed(result.scalars().all()))
 
-    # Save user message
-    user_msg = ChatMessage(
-        session_id=session_id,
-        role="user",
-        content=user_content,
-    )
-    db.add(user_msg)
-    await db.commit()
 
-    # RAG: search for relevant chunks
-    search_results = await vector_search(db, user_content, top_k=MAX_CONTEXT_CHUNKS)
+async def _retrieve(query: str, timings: dict) -> list[dict]:
+    if settings.CHAT_RETRIEVAL_MODE == "hybrid":
+        results, leg_timings = await hybrid_search(query, top_k=settings.CHAT_CONTEXT_CANDIDATES)
+        timings.update({k: v for k, v in leg_timings.items() if k != "total_ms"})
+        return results
+    async with async_session() as db:
+        return await vector_search(db, query, top_k=settings.CHAT_CONTEXT_CANDIDATES)
 
-    # Build context from search results
-    context_parts = []
-    context_chunk_ids = []
-    for result in search_results:
-        context_parts.append(
-            f"--- Source: {result['filename']}, Chunk {result['chunk_index']} (score: {result['score']}) ---\n{result['content']}"
-        )
-        context_chunk_ids.append(str(result["chunk_id"]))
 
-    context_text = "\n\n".join(context_parts)
+async def _save_user_message(message_id: UUID, session_id: UUID, content: str) -> None:
+    async with async_session() as db:
+        db.add(ChatMessage(id=message_id, session_id=session_id, role="user", content=content))
+        await db.commit()
+
+
+async def _replay(tokens: list[str]) -> AsyncIterator[str]:
+    for token in tokens:
+        yield token
+
+
+async def prepare_message(db: AsyncSession, session_id: UUID, user_content: str) -> dict:
+    """Everything before generation: RAG search, context assembly and the answer-cache lookup.
+
+    Session/persona lookup, history fetch and retrieval run concurrently on
+    separate sessions. Nothing is written, so a caller may still reject the
+    turn (e.g. with 429) based on the result: ``cached_tokens`` is set when
+    the answer cache can replay an answer without calling the provider.
+    History is the latest conversation summary plus the turns after it.
+    """
+    start = time.perf_counter()
+    timings: dict[str, float] = {}
+
+    # Pre-generated so history never picks up this turn's user message
+    user_msg_id = uuid4()
+    session, (summary, history_messages), search_results = await asyncio.gather(
+        _timed("session", timings, _load_session(db, session_id)),
+        _timed("history", timings, _load_history(session_id, user_msg_id)),
+        _timed("retrieval", timings, _retrieve(user_content, timings)),
+    )
+
+    prompt_start = time.perf_counter()
 
     # Get system prompt
     system_prompt = DEFAULT_SYSTEM_PROMPT
     if session.persona and session.persona.system_prompt:
         system_prompt = session.persona.system_prompt
 
-    # Build messages for LLM
-    messages = [{"role": "system", "content": system_prompt}]
-
-    if context_text:
-        messages.append({
-            "role": "system",
-            "content": f"Here is relevant context from the knowledge base:\n\n{context_text}",
-        })
-
-    # Add recent chat history
-    history_stmt = (
-        select(ChatMessage)
-        .where(ChatMessage.session_id == session_id)
-        .order_by(ChatMessage.created_at.desc())
-        .limit(MAX_HISTORY_MESSAGES + 1)  # +1 for the current user message
+    # Pack retrieved chunks and history into the provider's token budget
+    history = [{"role": msg.role, "content": msg.content} for msg in history_messages]
+    messages, packing = await asyncio.to_thread(
+        assemble_prompt,
+        session.llm_provider,
+        system_prompt,
+        user_content,
+        history,
+        search_results,
+        summary.content if summary else None,
     )
-    history_result = await db.execute(history_stmt)
-    history_messages = list(reversed(history_result.scalars().all()))
 
-    for msg in history_messages:
-        if msg.role in ("user", "assistant"):
-            messages.append({"role": msg.role, "content": msg.content})
-
-    # Stream LLM response
-    provider = get_llm_provider(session.llm_provider)
+    cache_key = query_embedding = cached_tokens = None
+    if answer_cache.enabled:
+        # The query embedding is normally already cached by retrieval
+        packed_history = history[-packing["history_messages"]:] if packing["history_messages"] else []
+        query_embedding, cache_key = await asyncio.gather(
+            embedding_service.aembed_single(user_content),
+            answer_cache.context_key(
+                session.llm_provider,
+                system_prompt,
+                packing["chunk_ids"],
+                packed_history,
+                summary.content if summary else None,
+            ),
+        )
+        if cache_key is not None:
+            cached_tokens = answer_cache.get(cache_key, query_embedding)
+    timings["prompt_ms"] = _ms(prompt_start)
+
+    return {
+        "start": start,
+        "timings": timings,
+        "session_id": session_id,
+        "session": session,
+        "user_msg_id": user_msg_id,
+        "user_content": user_content,
+        "first_turn": not history_messages and summary is None,
+        "messages": messages,
+        "packing": packing,
+        "cache_key": cache_key,
+        "query_embedding": query_embedding,
+        "cached_tokens": cached_tokens,
+    }
+
+
+async def stream_reply(db: AsyncSession, turn: dict, ticket: LLMTicket | None = None) -> AsyncIterator[str]:
+    """Stream the answer for a prepared turn and store both messages.
+
+    The user message is written in the background while the answer streams;
+    it only has to land before the assistant message. Stage timings and time
+    to first token are stored on the assistant message. Generation waits for
+    a provider slot from the LLM scheduler: callers that must reject before
+    streaming starts reserve ``ticket`` up front, otherwise one is reserved
+    here, raising LLMQueueFull if the queue is full. Cache hits need no slot.
+    """
+    session_id = turn["session_id"]
+    session = turn["session"]
+    timings = turn["timings"]
+    packing = turn["packing"]
+    cached_tokens = turn["cached_tokens"]
+    context_chunk_ids = packing["chunk_ids"]
+
+    if cached_tokens is not None:
+        if ticket is not None:
+            ticket.cancel()
+        slot, stream = contextlib.nullcontext(), _replay(cached_tokens)
+    else:
+        if ticket is None:
+            ticket = llm_scheduler.reserve(session.llm_provider, session_id)
+        slot, stream = ticket, get_llm_provider(session.llm_provider).generate_stream(turn["messages"])
+
+    user_write = asyncio.create_task(
+        _timed("user_write", timings, _save_user_message(turn["user_msg_id"], session_id, turn["user_content"]))
+    )
     full_response = []
+    async with slot:
+        timings["queue_ms"] = ticket.wait_ms if ticket is not None else 0.0
+        generation_start = time.perf_counter()
+        async for token in stream:
+            if not full_response:
+                timings["ttft_ms"] = _ms(turn["start"])
+            full_response.append(token)
+            yield token
+        timings["generation_ms"] = _ms(generation_start)
+
+    # Only complete answers are cached; a disconnect mid-stream never gets here
+    if turn["cache_key"] is not None and cached_tokens is None and full_response:
+        answer_cache.set(turn["cache_key"], turn["query_embedding"], full_response)
+
+    await user_write
+    timings["total_ms"] = _ms(turn["start"])
+    logger.info(
+        f"Chat message in session {session_id}: {packing['prompt_tokens']}/{packing['budget']} prompt tokens "
+        f"({len(context_chunk_ids)} chunks, {packing['history_messages']} history messages"
+        f"{', answer cache hit' if cached_tokens is not None else ''}), timings {timings}"
+    )
 
-    async for token in provider.generate_stream(messages):
-        full_response.append(token)
-        yield token
+    # created_at defaults to now(), the transaction start; end the read transaction opened at the
+    # session lookup so the reply is stamped after the user message written on its own connection
+    await db.commit()
 
     # Save assistant message
     assistant_msg = ChatMessage(
@@ -98,11 +221,16 @@ async def handle_message(
         role="assistant",
         content="".join(full_response),
         context_chunks=context_chunk_ids if context_chunk_ids else None,
+        timings=timings,
     )
     db.add(assistant_msg)
 
     # Update session title from first message
-    if len(history_messages) <= 1:
-        session.title = user_content[:100]
+    if turn["first_turn"]:
+        session.title = turn["user_content"][:100]
 
     await db.commit()
+
+    # Older turns are folded into a summary after the response, off the user's critical path
+    schedule_compaction(session_id, session.llm_provider)
+
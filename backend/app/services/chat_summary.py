@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session
+from app.models.chat import ChatMessage
+from app.services.context_assembler import MESSAGE_OVERHEAD_TOKENS, get_token_counter, prompt_budget
+from app.services.llm.factory import get_llm_provider
+from app.services.llm.scheduler import LLMQueueFull, llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_ROLE = "summary"
+# The newest turns always stay verbatim
+MIN_RECENT_MESSAGES = 2
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an assistant.
+Merge the previous summary (if any) with the new turns into one concise summary.
+Keep facts, decisions, names, numbers and open questions; drop pleasantries.
+Write plain prose in the third person and reply with the summary only."""
+
+_tasks: dict[UUID, asyncio.Task] = {}
+
+
+async def latest_summary(db: AsyncSession, session_id: UUID) -> ChatMessage | None:
+    result = await db.execute(
+        select(ChatMessage)
+        .where(ChatMessage.session_id == session_id, ChatMessage.role == SUMMARY_ROLE)
+        .order_by(ChatMessage.created_at.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+def _transcript(messages: list[ChatMessage]) -> str:
+    return "\n\n".join(f"{m.role.capitalize()}: {m.content}" for m in messages)
+
+
+async def compact_session(session_id: UUID, provider_name: str) -> bool:
+    """Fold older turns into a new summary message once unsummarized history passes the trigger.
+
+    Turns are summarized oldest first in passes bounded by half the prompt
+    budget; each pass writes a summary covering exactly the turns it read,
+    so a long backlog is never skipped. Returns True if a summary was written.
+    """
+    async with async_session() as db:
+        summary = await latest_summary(db, session_id)
+        stmt = (
+            select(ChatMessage)
+            .where(ChatMessage.session_id == session_id, ChatMessage.role.in_(("user", "assistant")))
+            .order_by(ChatMessage.created_at)
+        )
+        if summary is not None:
+            stmt = stmt.where(ChatMessage.created_at > summary.summary_until)
+        messages = list((await db.execute(stmt)).scalars().all())
+        if len(messages) <= MIN_RECENT_MESSAGES:
+            return False
+
+        count = await asyncio.to_thread(get_token_counter, provider_name)
+        sizes = await asyncio.to_thread(count, [m.content for m in messages])
+        sizes = [size + MESSAGE_OVERHEAD_TOKENS for size in sizes]
+        if sum(sizes) <= settings.CHAT_SUMMARY_TRIGGER_TOKENS:
+            return False
+
+        keep = used = 0
+        for size in reversed(sizes):
+            if keep >= MIN_RECENT_MESSAGES and used + size > settings.CHAT_SUMMARY_KEEP_TOKENS:
+                break
+            used += size
+            keep += 1
+        older = messages[:len(messages) - keep]
+        if not older:
+            return False
+
+    # The connection is released while the provider generates
+    provider = get_llm_provider(provider_name)
+    allowance = prompt_budget(provider_name) // 2
+    previous = summary.content if summary is not None else None
+    done = 0
+    while done < len(older):
+        # As many of the oldest remaining turns as fit the allowance, at least one
+        end, used = done + 1, sizes[done]
+        while end < len(older) and used + sizes[end] <= allowance:
+            used += sizes[end]
+            end += 1
+        included = older[done:end]
+
+        # Summaries share the provider's queue with chat and are deferred under load; the next turn retries
+        try:
+            ticket = llm_scheduler.reserve(provider_name, session_id)
+        except LLMQueueFull:
+            logger.info(f"Session {session_id}: LLM queue full, summarization deferred")
+            break
+        parts = []
+        if previous is not None:
+            parts.append(f"Previous summary:\n{previous}")
+        parts.append(f"New turns:\n{_transcript(included)}")
+        async with ticket:
+            text = await provider.generate([
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": "\n\n".join(parts)},
+            ])
+        if not text.strip():
+            break
+
+        async with async_session() as db:
+            db.add(ChatMessage(
+                session_id=session_id,
+                role=SUMMARY_ROLE,
+                content=text.strip(),
+                summary_until=included[-1].created_at,
+            ))
+            await db.commit()
+        previous = text.strip()
+        done = end
+
+    if done:
+        logger.info(f"Session {session_id}: summarized {done} messages, {len(messages) - done} kept verbatim")
+    return done > 0
+
+
+async def _run(session_id: UUID, provider_name: str):
+    try:
+        await compact_session(session_id, provider_name)
+    except Exception:
+        logger.exception(f"Conversation summarization failed for session {session_id}")
+
+
+def schedule_compaction(session_id: UUID, provider_name: str) -> None:
+    """Start compaction in the background; at most one runs per session."""
+    if not settings.CHAT_SUMMARY_ENABLED:
+        return
+    task = _tasks.get(session_id)
+    if task is not None and not task.done():
+        return
+    task = asyncio.create_task(_run(session_id, provider_name))
+    _tasks[session_id] = task
+    task.add_done_callback(lambda t: _tasks.pop(session_id, None) if _tasks.get(session_id) is t else None)
+
+
+async def shutdown_compactions() -> None:
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.document import Chunk
+from app.services.embedding import embedding_service
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_BATCH_SIZE = 1000
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DiskEmbeddingCache:
+    """SQLite-backed store of float32 chunk vectors keyed by (model, content hash)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, content_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, content_hash))"
+            )
+        return self._conn
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+                batch = hashes[i:i + LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT content_hash, vector FROM embeddings WHERE model = ? AND content_hash IN ({placeholders})",
+                    [model, *batch],
+                )
+                for digest, blob in rows:
+                    found[digest] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, model: str, items: dict[str, list[float]]) -> None:
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, content_hash, vector) VALUES (?, ?, ?)",
+                [(model, digest, np.asarray(vector, dtype=np.float32).tobytes()) for digest, vector in items.items()],
+            )
+            self.conn.commit()
+
+
+disk_cache = DiskEmbeddingCache(settings.EMBEDDING_DISK_CACHE_PATH) if settings.EMBEDDING_DISK_CACHE_PATH else None
+
+
+async def _lookup_database(db: AsyncSession, model: str, hashes: list[str]) -> dict[str, list[float]]:
+    found = {}
+    for i in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+        batch = hashes[i:i + LOOKUP_BATCH_SIZE]
+        stmt = (
+            select(Chunk.content_hash, Chunk.embedding)
+            .where(
+                Chunk.embedding_model == model,
+                Chunk.content_hash.in_(batch),
+                Chunk.embedding.is_not(None),
+            )
+            .distinct(Chunk.content_hash)
+        )
+        result = await db.execute(stmt)
+        for digest, embedding in result.all():
+            found[digest] = [float(x) for x in embedding]
+    return found
+
+
+async def embed_chunks(db: AsyncSession, chunks: list[str]) -> tuple[list[list[float]], list[str]]:
+    """Embed chunks, reusing vectors for content already embedded with the current model.
+
+    Lookup order is the chunks table, then the on-disk cache; only true
+    misses (deduplicated) are sent to the model. Returns the embeddings and
+    the content hashes, both aligned with ``chunks``.
+    """
+    model = embedding_service.model_id
+    hashes = [content_hash(chunk) for chunk in chunks]
+    unique_hashes = list(dict.fromkeys(hashes))
+
+    vectors = await _lookup_database(db, model, unique_hashes)
+    from_db = len(vectors)
+
+    missing = [h for h in unique_hashes if h not in vectors]
+    if missing and disk_cache is not None:
+        vectors.update(await asyncio.to_thread(disk_cache.get_many, model, missing))
+    from_disk = len(vectors) - from_db
+
+    missing = [h for h in unique_hashes if h not in vectors]
+    if missing:
+        texts = {h: c for h, c in zip(hashes, chunks)}
+        new_vectors = await embedding_service.aembed_batch([texts[h] for h in missing])
+        computed = dict(zip(missing, new_vectors))
+        vectors.update(computed)
+        if disk_cache is not None:
+            await asyncio.to_thread(disk_cache.put_many, model, computed)
+
+    logger.info(
+        f"Embedded {len(chunks)} chunks: {from_db} reused from database, "
+        f"{from_disk} from disk cache, {len(missing)} computed"
+    )
+    return [vectors[h] for h in hashes], hashes
@@ -0,0 +1,181 @@
+import uuid
+
+import numpy as np
+from sqlalchemy import all_, bindparam, case, cast, column, delete, func, insert, select, table, text, update
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.config import settings
+from app.models.document import Chunk
+
+COPY_COLUMNS = [
+    "id", "document_id", "chunk_index", "content", "token_count",
+    "page_start", "page_end", "embedding", "content_hash", "embedding_model",
+    "canonical_chunk_id", "minhash", "lsh_bands",
+]
+# Per-transaction table that COPY fills before rows move into chunks with their tsvector
+COPY_STAGING_TABLE = "chunks_copy_staging"
+
+
+def _encode_vector(value) -> bytes:
+    # pgvector binary format: uint16 dim, uint16 unused, dim x big-endian float32
+    array = np.asarray(value, dtype=">f4")
+    return np.array([array.shape[0], 0], dtype=">u2").tobytes() + array.tobytes()
+
+
+def _decode_vector(data: bytes) -> np.ndarray:
+    dim = int(np.frombuffer(data[:2], dtype=">u2")[0])
+    return np.frombuffer(data[4:4 + 4 * dim], dtype=">f4").astype(np.float32)
+
+
+async def release_canonicals(db: AsyncSession, *doomed) -> int:
+    """Hand canonical status of chunks about to be deleted to one of their near-duplicates.
+
+    ``doomed`` are WHERE criteria on Chunk selecting the rows to be deleted.
+    For each doomed canonical, the surviving duplicate with the lowest id
+    inherits its embedding and full-text vector and the other duplicates are
+    repointed at it. Returns the number of duplicates promoted.
+    """
+    doomed_ids = select(Chunk.id).where(*doomed)
+    duplicate = aliased(Chunk)
+    result = await db.execute(
+        select(duplicate.id, duplicate.canonical_chunk_id)
+        .where(duplicate.canonical_chunk_id.in_(doomed_ids), duplicate.id.not_in(doomed_ids))
+        .distinct(duplicate.canonical_chunk_id)
+        .order_by(duplicate.canonical_chunk_id, duplicate.id)
+    )
+    heirs = result.all()
+    if not heirs:
+        return 0
+
+    source = aliased(Chunk)
+    for i in range(0, len(heirs), settings.CHUNK_WRITE_BATCH_SIZE):
+        batch = heirs[i:i + settings.CHUNK_WRITE_BATCH_SIZE]
+        # SET expressions see the old row, so the subqueries still follow the old reference
+        await db.execute(
+            update(Chunk)
+            .where(Chunk.id.in_([heir.id for heir in batch]))
+            .values(
+                embedding=select(source.embedding).where(source.id == Chunk.canonical_chunk_id).scalar_subquery(),
+                embedding_model=select(source.embedding_model).where(source.id == Chunk.canonical_chunk_id).scalar_subquery(),
+                content_tsv=func.to_tsvector(cast(settings.FTS_CONFIG, REGCONFIG), Chunk.content),
+                canonical_chunk_id=None,
+            )
+        )
+        await db.execute(
+            update(Chunk.__table__)
+            .where(Chunk.__table__.c.canonical_chunk_id == bindparam("old_id"))
+            .values(canonical_chunk_id=bindparam("heir_id")),
+            [{"old_id": heir.canonical_chunk_id, "heir_id": heir.id} for heir in batch],
+        )
+    return len(heirs)
+
+
+async def delete_chunks(db: AsyncSession, document_id: uuid.UUID, keep_ids: list[uuid.UUID] | None = None) -> int:
+    """Delete a document's chunks (except ``keep_ids``) with one set-based statement.
+
+    Near-duplicates elsewhere that reference a deleted chunk are re-homed
+    first. Returns the number of rows deleted.
+    """
+    criteria = [Chunk.document_id == document_id]
+    if keep_ids:
+        # One array parameter, not one per id: large keep lists stay under the bind-parameter limit
+        criteria.append(Chunk.id != all_(bindparam("keep_ids", list(keep_ids), type_=ARRAY(UUID(as_uuid=True)))))
+    await release_canonicals(db, *criteria)
+    result = await db.execute(delete(Chunk).where(*criteria))
+    return result.rowcount
+
+
+async def update_chunk_positions(db: AsyncSession, updates: list[dict]) -> None:
+    """Renumber reused chunks; each dict holds id, chunk_index, page_start and page_end."""
+    for i in range(0, len(updates), settings.CHUNK_WRITE_BATCH_SIZE):
+        await db.execute(update(Chunk), updates[i:i + settings.CHUNK_WRITE_BATCH_SIZE])
+
+
+async def _copy_rows(db: AsyncSession, rows: list[dict]) -> None:
+    """COPY rows into an unindexed staging table, then move them into chunks in one INSERT ... SELECT.
+
+    The full-text vector is computed on the way in, so every row is written
+    (and indexed) once; updating content_tsv after a direct COPY would
+    rewrite every row and its HNSW and GIN entries.
+    """
+    # Created once per transaction and emptied after each load, so batched writes reuse it
+    await db.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {COPY_STAGING_TABLE} "
+        f"(LIKE {Chunk.__tablename__} INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    driver = raw.driver_connection
+    # Binary COPY needs a binary codec for vector; it is scoped to this call
+    # because the ORM binds vectors as text on the same pooled connection.
+    await driver.set_type_codec(
+        "vector", schema="public", encoder=_encode_vector, decoder=_decode_vector, format="binary"
+    )
+    try:
+        for i in range(0, len(rows), settings.CHUNK_WRITE_BATCH_SIZE):
+            batch = rows[i:i + settings.CHUNK_WRITE_BATCH_SIZE]
+            await driver.copy_records_to_table(
+                COPY_STAGING_TABLE,
+                records=[tuple(row[name] for name in COPY_COLUMNS) for row in batch],
+                columns=COPY_COLUMNS,
+            )
+    finally:
+        await driver.reset_type_codec("vector", schema="public")
+
+    staging = table(COPY_STAGING_TABLE, *(column(name) for name in COPY_COLUMNS))
+    # Near-duplicates stay out of the full-text index, as they do out of the vector index
+    tsv = case(
+        (
+            staging.c.canonical_chunk_id.is_(None),
+            func.to_tsvector(cast(settings.FTS_CONFIG, REGCONFIG), staging.c.content),
+        ),
+    )
+    await db.execute(
+        insert(Chunk.__table__).from_select(
+            COPY_COLUMNS + ["content_tsv"],
+            select(*(staging.c[name] for name in COPY_COLUMNS), tsv),
+        )
+    )
+    await db.execute(text(f"DELETE FROM {COPY_STAGING_TABLE}"))
+
+
+async def _executemany_rows(db: AsyncSession, rows: list[dict]) -> None:
+    stmt = insert(Chunk).values(
+        content_tsv=func.to_tsvector(cast(settings.FTS_CONFIG, REGCONFIG), bindparam("tsv_source"))
+    )
+    for i in range(0, len(rows), settings.CHUNK_WRITE_BATCH_SIZE):
+        batch = rows[i:i + settings.CHUNK_WRITE_BATCH_SIZE]
+        # Near-duplicates stay out of the full-text index, as they do out of the vector index
+        await db.execute(stmt, [
+            {**row, "tsv_source": None if row["canonical_chunk_id"] else row["content"]} for row in batch
+        ])
+
+
+async def insert_chunks(db: AsyncSession, document_id: uuid.UUID, rows: list[dict], method: str | None = None) -> None:
+    """Bulk-insert chunk rows for one document inside the caller's transaction.
+
+    Rows carry the columns in COPY_COLUMNS (``id`` is generated if missing,
+    page numbers and near-duplicate columns default to NULL).
+    ``copy`` streams them with binary COPY through a staging table;
+    ``executemany`` sends batched INSERTs.
+    """
+    if not rows:
+        return
+    defaults = {
+        "page_start": None,
+        "page_end": None,
+        "canonical_chunk_id": None,
+        "minhash": None,
+        "lsh_bands": None,
+    }
+    rows = [{"id": uuid.uuid4(), **defaults, **row} for row in rows]
+    method = method or settings.CHUNK_WRITE_METHOD
+
+    if method == "copy":
+        await _copy_rows(db, rows)
+    elif method == "executemany":
+        await _executemany_rows(db, rows)
+    else:
+        raise ValueError(f"Unknown chunk write method: {method}")
@@ -0,0 +1,97 @@
+"""Compare chunk persistence paths against a live database.
+
+Each path writes the same synthetic chunks for a throwaway document inside a
+transaction that is rolled back, so the benchmark leaves no data behind.
+
+Usage: python -m app.services.chunk_store_benchmark [--chunks 5000] [--repeat 3]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import numpy as np
+from sqlalchemy import cast, func, select
+from sqlalchemy.dialects.postgresql import REGCONFIG
+
+from app.config import settings
+from app.database import async_session, engine
+from app.models.document import Chunk, Document, DocumentStatus
+from app.services.chunk_store import delete_chunks, insert_chunks
+
+
+def _synthetic_rows(document_id: uuid.UUID, count: int) -> list[dict]:
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((count, settings.EMBEDDING_DIMENSION)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    words = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+    rows = []
+    for i in range(count):
+        content = " ".join(words[(i + j) % len(words)] for j in range(300))
+        rows.append({
+            "document_id": document_id,
+            "chunk_index": i,
+            "content": content,
+            "token_count": 300,
+            "embedding": vectors[i].tolist(),
+            "content_hash": f"{i:064x}",
+            "embedding_model": settings.EMBEDDING_MODEL,
+        })
+    return rows
+
+
+async def _orm_path(db, document_id: uuid.UUID, rows: list[dict]):
+    # The pre-bulk implementation: load and delete each chunk, then add one ORM object per row
+    existing = await db.execute(select(Chunk).where(Chunk.document_id == document_id))
+    for chunk in existing.scalars().all():
+        await db.delete(chunk)
+    for row in rows:
+        db.add(Chunk(**row, content_tsv=func.to_tsvector(cast(settings.FTS_CONFIG, REGCONFIG), row["content"])))
+    await db.flush()
+
+
+async def _bulk_path(db, document_id: uuid.UUID, rows: list[dict], method: str):
+    await delete_chunks(db, document_id)
+    await insert_chunks(db, document_id, rows, method=method)
+
+
+async def _time_path(name: str, count: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        async with async_session() as db:
+            doc = Document(filename="benchmark.txt", file_type="txt", status=DocumentStatus.PROCESSING)
+            db.add(doc)
+            await db.flush()
+            rows = _synthetic_rows(doc.id, count)
+            # Write once so the timed run also pays for replacing existing chunks
+            await _bulk_path(db, doc.id, rows, "executemany")
+
+            start = time.perf_counter()
+            if name == "orm":
+                await _orm_path(db, doc.id, rows)
+            else:
+                await _bulk_path(db, doc.id, rows, name)
+            best = min(best, time.perf_counter() - start)
+            await db.rollback()
+    return best
+
+
+async def _run(count: int, repeat: int):
+    print(f"{count} chunks, best of {repeat}, batch size {settings.CHUNK_WRITE_BATCH_SIZE}")
+    print(f"{'path':<12} {'seconds':>9} {'chunks/s':>10}")
+    for name in ("orm", "executemany", "copy"):
+        elapsed = await _time_path(name, count, repeat)
+        print(f"{name:<12} {elapsed:>9.3f} {count / elapsed:>10.0f}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(_run(args.chunks, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import logging
+from functools import lru_cache
+
+from app.config import settings
+from app.utils.chunking import TokenCounter, tokenizer_counter
+
+logger = logging.getLogger(__name__)
+
+# Chat templates add a few role/separator tokens around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+CONTEXT_HEADER = "Here is relevant context from the knowledge base:\n\n"
+SUMMARY_HEADER = "Summary of the earlier conversation:\n\n"
+
+
+def _estimate_tokens(texts: list[str]) -> list[int]:
+    return [len(t) // 4 + 1 for t in texts]
+
+
+def _tiktoken_counter(encoding_name: str) -> TokenCounter:
+    import tiktoken
+
+    encoding = tiktoken.get_encoding(encoding_name)
+    return lambda texts: [len(ids) for ids in encoding.encode_ordinary_batch(texts)]
+
+
+def _hf_counter(name: str) -> TokenCounter:
+    from transformers import AutoTokenizer
+
+    return tokenizer_counter(AutoTokenizer.from_pretrained(name))
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(provider_name: str) -> TokenCounter:
+    """Token counter for the provider's target model; may download a tokenizer on first use.
+
+    Falls back to a 4-characters-per-token estimate when no tokenizer is
+    configured or it cannot be loaded.
+    """
+    try:
+        if provider_name == "ollama" and settings.OLLAMA_TOKENIZER:
+            return _hf_counter(settings.OLLAMA_TOKENIZER)
+        if provider_name == "azure_openai" and settings.AZURE_OPENAI_TOKENIZER:
+            return _tiktoken_counter(settings.AZURE_OPENAI_TOKENIZER)
+    except Exception:
+        logger.warning(f"Failed to load tokenizer for '{provider_name}'; estimating token counts", exc_info=True)
+        return _estimate_tokens
+    logger.warning(f"No tokenizer configured for '{provider_name}'; estimating token counts")
+    return _estimate_tokens
+
+
+def prompt_budget(provider_name: str) -> int:
+    if provider_name == "azure_openai":
+        return settings.AZURE_OPENAI_PROMPT_TOKEN_BUDGET
+    return settings.OLLAMA_PROMPT_TOKEN_BUDGET
+
+
+def _overlap(head: str, tail: str) -> int:
+    """Length of the longest suffix of ``head`` that is a prefix of ``tail``."""
+    probe = tail[:32]
+    if not probe:
+        return 0
+    pos = head.find(probe)
+    while pos != -1:
+        if tail.startswith(head[pos:]):
+            return len(head) - pos
+        pos = head.find(probe, pos + 1)
+    return 0
+
+
+def merge_adjacent(results: list[dict]) -> list[dict]:
+    """Merge chunks that are consecutive in the same document, dropping the overlap they share.
+
+    Blocks keep the best score of their chunks and are returned best first.
+    """
+    ordered = sorted(results, key=lambda r: (str(r["document_id"]), r["chunk_index"]))
+    blocks: list[dict] = []
+    for r in ordered:
+        last = blocks[-1] if blocks else None
+        if last and last["document_id"] == r["document_id"] and last["chunk_end"] + 1 == r["chunk_index"]:
+            overlap = _overlap(last["content"], r["content"])
+            last["content"] += r["content"][overlap:] if overlap else "\n" + r["content"]
+            last["chunk_end"] = r["chunk_index"]
+            last["score"] = max(last["score"], r["score"])
+            last["chunk_ids"].append(str(r["chunk_id"]))
+        else:
+            blocks.append({
+                "document_id": r["document_id"],
+                "filename": r["filename"],
+                "chunk_start": r["chunk_index"],
+                "chunk_end": r["chunk_index"],
+                "content": r["content"],
+                "score": r["score"],
+                "chunk_ids": [str(r["chunk_id"])],
+            })
+    return sorted(blocks, key=lambda b: b["score"], reverse=True)
+
+
+def _format_block(block: dict) -> str:
+    if block["chunk_start"] == block["chunk_end"]:
+        where = f"Chunk {block['chunk_start']}"
+    else:
+        where = f"Chunks {block['chunk_start']}-{block['chunk_end']}"
+    return f"--- Source: {block['filename']}, {where} (score: {block['score']}) ---\n{block['content']}"
+
+
+def assemble_prompt(
+    provider_name: str,
+    system_prompt: str,
+    user_content: str,
+    history: list[dict],
+    results: list[dict],
+    summary: str | None = None,
+) -> tuple[list[dict], dict]:
+    """Build the LLM messages within the provider's prompt token budget.
+
+    The system prompt, the conversation summary (if any) and the current
+    message are always sent. History
+    (newest first, whole messages, contiguous) may use up to
+    CHAT_HISTORY_MAX_SHARE of what remains; retrieved chunks are then added
+    greedily by score, merging neighbours from the same document, and any
+    budget they leave is given back to older history. Runs blocking
+    tokenizer calls, so call it from a thread.
+    """
+    count = get_token_counter(provider_name)
+    budget = prompt_budget(provider_name)
+
+    def tokens(texts: list[str]) -> int:
+        return sum(count(texts)) + MESSAGE_OVERHEAD_TOKENS * len(texts) if texts else 0
+
+    summary_message = SUMMARY_HEADER + summary if summary else None
+    fixed = tokens([system_prompt, user_content] + ([summary_message] if summary_message else []))
+    remaining = budget - fixed
+
+    history = [m for m in history if m["role"] in ("user", "assistant")]
+    history_sizes = count([m["content"] for m in history]) if history else []
+
+    def take_history(allowance: int) -> tuple[int, int]:
+        used = kept = 0
+        for size in reversed(history_sizes):
+            if used + size + MESSAGE_OVERHEAD_TOKENS > allowance:
+                break
+            used += size + MESSAGE_OVERHEAD_TOKENS
+            kept += 1
+        return kept, used
+
+    history_kept, history_used = take_history(int(max(remaining, 0) * settings.CHAT_HISTORY_MAX_SHARE))
+
+    # Greedy by score: a candidate is kept if the merged context still fits
+    selected: list[dict] = []
+    context_used = 0
+    context_budget = remaining - history_used
+    for result in sorted(results, key=lambda r: r["score"], reverse=True):
+        trial = merge_adjacent(selected + [result])
+        size = tokens([CONTEXT_HEADER + "\n\n".join(_format_block(b) for b in trial)])
+        if size <= context_budget:
+            selected.append(result)
+            context_used = size
+
+    history_kept, history_used = take_history(max(remaining - context_used, 0))
+
+    blocks = merge_adjacent(selected)
+    messages = [{"role": "system", "content": system_prompt}]
+    if summary_message:
+        messages.append({"role": "system", "content": summary_message})
+    if blocks:
+        messages.append({
+            "role": "system",
+            "content": CONTEXT_HEADER + "\n\n".join(_format_block(b) for b in blocks),
+        })
+    if history_kept:
+        messages.extend({"role": m["role"], "content": m["content"]} for m in history[-history_kept:])
+    messages.append({"role": "user", "content": user_content})
+
+    stats = {
+        "budget": budget,
+        "prompt_tokens": fixed + context_used + history_used,
+        "context_tokens": context_used,
+        "history_tokens": history_used,
+        "history_messages": history_kept,
+        "chunk_ids": [chunk_id for b in blocks for chunk_id in b["chunk_ids"]],
+    }
+    return messages, stats
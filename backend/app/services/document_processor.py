@@ -1,6 +1,10 @@
+import contextlib
+import copy
 import logging
 import os
+import threading
 import uuid
+from functools import lru_cache
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,60 +12,200 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
 from app.database import async_session
 from app.models.document import Chunk, Document, DocumentStatus
+from app.services.chunk_embeddings import content_hash, embed_chunks
+from app.services.chunk_store import delete_chunks, insert_chunks, update_chunk_positions
 from app.services.embedding import embedding_service
-from app.utils.chunking import chunk_text
-from app.utils.text_extraction import extract_text
+from app.services.near_dup import NearDuplicateIndex
+from app.services.progress import DocumentProgress
+from app.services.result_cache import search_result_cache
+from app.utils.async_iter import aiter_in_thread
+from app.utils.chunking import TokenCounter, chunk_pages, tokenizer_counter, with_sizes
+from app.utils.text_extraction import iter_pages
 
 logger = logging.getLogger(__name__)
 
 
-async def process_document(document_id: uuid.UUID):
-    """Process a document: extract text, chunk, embed, and store."""
+# Guards the chunking tokenizer, which every chunking thread shares
+_counter_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _chunk_counter() -> TokenCounter | None:
+    if settings.CHUNK_COUNT_MODE == "tokens":
+        # A private copy: fast tokenizers must not be shared with the threads running encode,
+        # nor used by two chunking threads at once ("Already borrowed")
+        count = tokenizer_counter(copy.deepcopy(embedding_service.model.tokenizer))
+
+        def locked_count(texts: list[str]) -> list[int]:
+            with _counter_lock:
+                return count(texts)
+        return locked_count
+    return None
+
+
+async def _embed_rows(
+    db: AsyncSession,
+    document_id: uuid.UUID,
+    chunks: list[tuple[int, str, int | None, int | None, int]],
+    near_dups: NearDuplicateIndex | None = None,
+) -> list[dict]:
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "document_id": document_id,
+            "chunk_index": chunk_index,
+            "content": content,
+            "token_count": token_count,
+            "page_start": page_start,
+            "page_end": page_end,
+            "embedding": None,
+            "content_hash": content_hash(content),
+            "embedding_model": embedding_service.model_id,
+        }
+        for chunk_index, content, page_start, page_end, token_count in chunks
+    ]
+    if near_dups is not None:
+        await near_dups.resolve(db, rows)
+
+    # Near-duplicates are stored without a vector of their own
+    to_embed = [row for row in rows if not row.get("canonical_chunk_id")]
+    if to_embed:
+        embeddings, _ = await embed_chunks(db, [row["content"] for row in to_embed])
+        for row, embedding in zip(to_embed, embeddings):
+            row["embedding"] = embedding
+    return rows
+
+
+async def _existing_chunks(db: AsyncSession, document_id: uuid.UUID) -> dict[str, list]:
+    """Stored chunks of a document that can be reused as-is, grouped by content hash."""
+    result = await db.execute(
+        select(Chunk.id, Chunk.content_hash, Chunk.chunk_index, Chunk.page_start, Chunk.page_end).where(
+            Chunk.document_id == document_id,
+            Chunk.embedding_model == embedding_service.model_id,
+            Chunk.content_hash.is_not(None),
+        )
+    )
+    existing: dict[str, list] = {}
+    for row in result.all():
+        existing.setdefault(row.content_hash, []).append(row)
+    return existing
+
+
+async def process_document(document_id: uuid.UUID) -> dict | None:
+    """Process a document: extract text, chunk, embed, and store.
+
+    With INGEST_INCREMENTAL, chunks whose content hash matches a stored chunk
+    keep their row and vector; only additions are embedded and inserted and
+    only removals are deleted. Returns per-run counts of reused, added and
+    removed chunks.
+
+    Stage progress (pages extracted, chunks produced/embedded, rows written)
+    is published to the progress broker as the run advances. New rows are
+    written batch by batch inside the run's transaction, so memory does not
+    grow with document size; replaced rows are deleted at the end.
+    """
     async with async_session() as db:
         doc = await db.get(Document, document_id)
         if not doc:
             logger.error(f"Document {document_id} not found")
-            return
+            return None
 
+        progress = DocumentProgress(document_id)
         try:
             doc.status = DocumentStatus.PROCESSING
             await db.commit()
+            progress.publish("extracting")
 
             filepath = os.path.join(settings.UPLOAD_DIR, str(doc.id), doc.filename)
-            text = extract_text(filepath, doc.file_type)
+            existing = await _existing_chunks(db, document_id) if settings.INGEST_INCREMENTAL else {}
+            near_dups = NearDuplicateIndex(document_id, embedding_service.model_id) if settings.NEAR_DUP_ENABLED else None
+
+            # Extraction and chunking run in a thread and stream chunks here;
+            # each batch is embedded and written while the next pages are still being read.
+            added_ids: list[uuid.UUID] = []
+            moved: list[dict] = []
+            kept_ids: list[uuid.UUID] = []
+            batch: list[tuple[int, str, int | None, int | None, int]] = []
+
+            async def write_batch(batch: list[tuple[int, str, int | None, int | None, int]]):
+                rows = await _embed_rows(db, document_id, batch, near_dups)
+                await insert_chunks(db, document_id, rows)
+                added_ids.extend(row["id"] for row in rows)
+                progress.chunks_embedded += len(batch)
+                progress.rows_written += len(rows)
+                progress.publish("embedding")
 
-            if not text.strip():
+            # token_count is stored in the unit the chunker measured
+            counter = _chunk_counter()
+            chunk_stream = with_sizes(
+                chunk_pages(
+                    progress.count_pages(iter_pages(filepath, doc.file_type)),
+                    settings.CHUNK_SIZE,
+                    settings.CHUNK_OVERLAP,
+                    count_tokens=counter,
+                ),
+                counter,
+            )
+            chunk_index = 0
+            async with contextlib.aclosing(aiter_in_thread(chunk_stream)) as chunks:
+                async for content, page_start, page_end, token_count in chunks:
+                    progress.chunks_produced += 1
+                    matches = existing.get(content_hash(content))
+                    if matches:
+                        kept = matches.pop()
+                        kept_ids.append(kept.id)
+                        progress.chunks_reused += 1
+                        if (kept.chunk_index, kept.page_start, kept.page_end) != (chunk_index, page_start, page_end):
+                            moved.append({
+                                "id": kept.id,
+                                "chunk_index": chunk_index,
+                                "page_start": page_start,
+                                "page_end": page_end,
+                            })
+                    else:
+                        batch.append((chunk_index, content, page_start, page_end, token_count))
+                        if len(batch) >= settings.INGEST_EMBED_BATCH_SIZE:
+                            await write_batch(batch)
+                            batch = []
+                    chunk_index += 1
+            if batch:
+                await write_batch(batch)
+
+            if chunk_index == 0:
                 doc.status = DocumentStatus.FAILED
                 doc.error_message = "No text content extracted from file"
                 await db.commit()
-                return
-
-            chunks = chunk_text(text, settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
-            embeddings = embedding_service.embed_batch(chunks)
-
-            # Delete existing chunks (for reprocessing)
-            existing = await db.execute(select(Chunk).where(Chunk.document_id == document_id))
-            for chunk in existing.scalars().all():
-                await db.delete(chunk)
-
-            for i, (chunk_content, embedding) in enumerate(zip(chunks, embeddings)):
-                chunk_obj = Chunk(
-                    document_id=document_id,
-                    chunk_index=i,
-                    content=chunk_content,
-                    token_count=len(chunk_content.split()),
-                    embedding=embedding,
-                )
-                db.add(chunk_obj)
+                progress.publish("failed", error=doc.error_message)
+                return None
+
+            progress.publish("writing")
+
+            # Everything not reused or just written goes, including rows embedded by another model
+            removed = await delete_chunks(db, document_id, keep_ids=kept_ids + added_ids)
+            await update_chunk_positions(db, moved)
+            progress.rows_written += len(moved)
 
             doc.status = DocumentStatus.COMPLETED
-            doc.chunk_count = len(chunks)
+            doc.chunk_count = chunk_index
             doc.error_message = None
             await db.commit()
-            logger.info(f"Document {document_id} processed: {len(chunks)} chunks")
+
+            near_duplicates = near_dups.duplicates if near_dups else 0
+            stats = {"reused": len(kept_ids), "added": len(added_ids), "removed": removed, "near_duplicates": near_duplicates}
+            progress.publish("completed", chunk_count=chunk_index, **stats)
+            if added_ids or removed or moved:
+                await search_result_cache.bump_version()
+            logger.info(
+                f"Document {document_id} processed: {chunk_index} chunks "
+                f"({len(kept_ids)} reused, {len(added_ids)} added, {removed} removed, "
+                f"{near_duplicates} stored as near-duplicates)"
+            )
+            return stats
 
         except Exception as e:
             logger.exception(f"Failed to process document {document_id}")
-            doc.status = DocumentStatus.FAILED
+            await db.rollback()
             doc.error_message = str(e)
             await db.commit()
+            # Re-raised so the job queue can retry; it settles the document's status
+            raise
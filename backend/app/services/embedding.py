@@ -1,34 +1,214 @@
+import asyncio
 import logging
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
 
-from sentence_transformers import SentenceTransformer
+import numpy as np
 
 from app.config import settings
+from app.services.embedding_batcher import QueryBatcher
+from app.services.encoders.base import EmbeddingBackend
+from app.services.encoders.factory import get_embedding_backend
+from app.utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a query so trivially different spellings share a cache entry."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def plan_batches(lengths: list[int], token_budget: int, max_batch_size: int) -> list[list[int]]:
+    """Group indices into length-sorted batches whose padded size fits the token budget.
+
+    Padded size is ``len(batch) * longest`` because every sequence is padded to
+    the longest one in its batch. A single over-budget text still gets a batch.
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    batches: list[list[int]] = []
+    current: list[int] = []
+    for i in order:
+        # lengths are ascending, so lengths[i] is the longest in the batch so far
+        if current and (len(current) >= max_batch_size or (len(current) + 1) * lengths[i] > token_budget):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def padded_tokens(lengths: list[int], batches: list[list[int]]) -> int:
+    return sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
+
+
+class EmbeddingLane:
+    """A dedicated thread pool with a bounded number of queued + running jobs.
+
+    Callers beyond the bound wait asynchronously for a slot, so the event
+    loop keeps serving other requests while the model is busy.
+    """
+
+    def __init__(self, name: str, workers: int, queue_size: int):
+        self.name = name
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self._executor: ThreadPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self.pending = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix=f"embed-{self.name}"
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.capacity)
+        async with self._slots:
+            self.pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, fn, *args)
+            finally:
+                self.pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "capacity": self.capacity, "pending": self.pending}
+
 
 class EmbeddingService:
     def __init__(self):
-        self._model: SentenceTransformer | None = None
+        self._model: EmbeddingBackend | None = None
+        self.cache = TTLCache(settings.EMBEDDING_CACHE_SIZE, settings.EMBEDDING_CACHE_TTL)
+        self.query_lane = EmbeddingLane(
+            "query", settings.EMBEDDING_QUERY_WORKERS, settings.EMBEDDING_QUERY_QUEUE_SIZE
+        )
+        self.ingest_lane = EmbeddingLane(
+            "ingest", settings.EMBEDDING_INGEST_WORKERS, settings.EMBEDDING_INGEST_QUEUE_SIZE
+        )
+        self.padding_stats = {"runs": 0, "tokens": 0, "padded_tokens": 0, "unbucketed_padded_tokens": 0}
+        self.batcher = QueryBatcher(
+            self._encode_queries,
+            self.query_lane,
+            settings.EMBEDDING_BATCH_WINDOW_MS,
+            settings.EMBEDDING_MAX_BATCH_SIZE,
+        )
 
     def load_model(self):
-        logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL}")
-        self._model = SentenceTransformer(settings.EMBEDDING_MODEL)
+        logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL} ({settings.EMBEDDING_BACKEND} backend)")
+        self._model = get_embedding_backend(settings.EMBEDDING_BACKEND)
         logger.info("Embedding model loaded successfully")
 
     @property
-    def model(self) -> SentenceTransformer:
+    def model(self) -> EmbeddingBackend:
         if self._model is None:
             self.load_model()
         return self._model
 
-    def embed_single(self, text: str) -> list[float]:
-        embedding = self.model.encode(text, normalize_embeddings=True)
+    @property
+    def model_id(self) -> str:
+        return self.model.model_id
+
+    def _cache_key(self, text: str) -> tuple[str, str]:
+        return (self.model_id, normalize_query(text))
+
+    def _encode_query(self, key: tuple[str, str]) -> list[float]:
+        embedding = self.model.encode(key[1], normalize_embeddings=True)
+        # Stored as float32 to keep the cache compact
+        self.cache.set(key, np.asarray(embedding, dtype=np.float32))
         return embedding.tolist()
 
+    def _encode_queries(self, keys: list[tuple[str, str]]) -> list[list[float]]:
+        unique = list(dict.fromkeys(keys))
+        embeddings = self.model.encode([key[1] for key in unique], normalize_embeddings=True)
+        vectors = {}
+        for key, embedding in zip(unique, embeddings):
+            self.cache.set(key, np.asarray(embedding, dtype=np.float32))
+            vectors[key] = embedding.tolist()
+        return [vectors[key] for key in keys]
+
+    def embed_single(self, text: str) -> list[float]:
+        key = self._cache_key(text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached.tolist()
+        return self._encode_query(key)
+
     def embed_batch(self, texts: list[str], batch_size: int = 64) -> list[list[float]]:
-        embeddings = self.model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
-        return embeddings.tolist()
+        """Embed texts in token-budgeted, length-bucketed batches, preserving input order."""
+        if not texts:
+            return []
+
+        lengths = self.model.token_lengths(texts)
+        batches = plan_batches(lengths, settings.EMBEDDING_BATCH_TOKEN_BUDGET, batch_size)
+
+        results: list[list[float] | None] = [None] * len(texts)
+        for batch in batches:
+            embeddings = self.model.encode(
+                [texts[i] for i in batch], batch_size=len(batch), normalize_embeddings=True
+            )
+            for i, embedding in zip(batch, embeddings):
+                results[i] = embedding.tolist()
+
+        self._record_padding(lengths, batches, batch_size)
+        return results
+
+    def _record_padding(self, lengths: list[int], batches: list[list[int]], batch_size: int):
+        tokens = sum(lengths)
+        padded = padded_tokens(lengths, batches)
+        # What fixed-size batches in document order would have cost, for comparison
+        in_order = [list(range(i, min(i + batch_size, len(lengths)))) for i in range(0, len(lengths), batch_size)]
+        unbucketed = padded_tokens(lengths, in_order)
+
+        stats = self.padding_stats
+        stats["runs"] += 1
+        stats["tokens"] += tokens
+        stats["padded_tokens"] += padded
+        stats["unbucketed_padded_tokens"] += unbucketed
+        logger.info(
+            f"Embedded {len(lengths)} texts in {len(batches)} batches: padding ratio "
+            f"{1 - tokens / padded:.3f} (fixed-size batches: {1 - tokens / unbucketed:.3f})"
+        )
+
+    def padding_summary(self) -> dict:
+        stats = dict(self.padding_stats)
+        stats["padding_ratio"] = round(1 - stats["tokens"] / stats["padded_tokens"], 4) if stats["padded_tokens"] else 0.0
+        stats["unbucketed_padding_ratio"] = (
+            round(1 - stats["tokens"] / stats["unbucketed_padded_tokens"], 4) if stats["unbucketed_padded_tokens"] else 0.0
+        )
+        return stats
+
+    async def aembed_single(self, text: str) -> list[float]:
+        """Embed an interactive query on the query lane; cache hits stay on the loop."""
+        key = self._cache_key(text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached.tolist()
+        if settings.EMBEDDING_MICRO_BATCHING:
+            return await self.batcher.submit(key)
+        return await self.query_lane.run(self._encode_query, key)
+
+    async def aembed_batch(self, texts: list[str], batch_size: int = 64) -> list[list[float]]:
+        """Embed ingest chunks on the ingest lane."""
+        return await self.ingest_lane.run(self.embed_batch, texts, batch_size)
+
+    def shutdown(self):
+        self.batcher.shutdown()
+        self.query_lane.shutdown()
+        self.ingest_lane.shutdown()
 
 
 embedding_service = EmbeddingService()
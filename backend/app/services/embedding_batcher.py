@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from typing import Callable
+
+from app.utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBatcher:
+    """Coalesces concurrent single-query embeddings into one model call.
+
+    The first query to arrive opens a window of ``window_ms``; everything
+    submitted before it closes (up to ``max_batch_size``) is encoded together
+    and the vectors are fanned back out to the waiting coroutines.
+    """
+
+    def __init__(self, encode_batch: Callable[[list], list], lane, window_ms: float, max_batch_size: int):
+        self.encode_batch = encode_batch
+        self.lane = lane
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue: asyncio.Queue | None = None
+        self._full: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._inflight: set[asyncio.Task] = set()
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.queue_wait_ms = Histogram([0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000])
+
+    async def submit(self, item):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._full = asyncio.Event()
+            self._task = asyncio.create_task(self._collect())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        if self._queue.qsize() >= self.max_batch_size:
+            self._full.set()
+        return await future
+
+    async def _collect(self):
+        while True:
+            first = await self._queue.get()
+            if self._queue.qsize() < self.max_batch_size - 1:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = [first]
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: list):
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            self.queue_wait_ms.observe((started - enqueued) * 1000)
+        self.batch_sizes.observe(len(batch))
+
+        items = [item for item, _, _ in batch]
+        try:
+            results = await self.lane.run(self.encode_batch, items)
+        except Exception as e:
+            logger.exception("Batched query embedding failed")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
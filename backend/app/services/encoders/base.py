@@ -0,0 +1,46 @@
+import copy
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# Guards lazy creation and use of each backend's length-counting tokenizer
+_length_lock = threading.Lock()
+
+
+class EmbeddingBackend(ABC):
+    """Runtime that turns text into normalized embedding vectors."""
+
+    @property
+    @abstractmethod
+    def model_id(self) -> str:
+        """Identifier stored with vectors; differs between backends that are not bit-identical."""
+        ...
+
+    @abstractmethod
+    def encode(self, texts: str | list[str], batch_size: int = 32, normalize_embeddings: bool = True) -> np.ndarray:
+        ...
+
+    @property
+    @abstractmethod
+    def tokenizer(self):
+        ...
+
+    @property
+    @abstractmethod
+    def max_seq_length(self) -> int:
+        ...
+
+    def token_lengths(self, texts: list[str]) -> list[int]:
+        """Tokenized length of each text as the model will see it (truncated, with special tokens).
+
+        Uses a private copy of the tokenizer: a fast tokenizer's truncation and
+        padding state must not change while another thread encodes with it
+        ("Already borrowed").
+        """
+        with _length_lock:
+            tokenizer = getattr(self, "_length_tokenizer", None)
+            if tokenizer is None:
+                tokenizer = self._length_tokenizer = copy.deepcopy(self.tokenizer)
+            encoded = tokenizer(texts, add_special_tokens=True, truncation=True, max_length=self.max_seq_length)
+        return [len(ids) for ids in encoded["input_ids"]]
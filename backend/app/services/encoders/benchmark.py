@@ -0,0 +1,55 @@
+"""Compare embedding backends for parity and throughput.
+
+Usage: python -m app.services.encoders.benchmark [--texts-file FILE] [--batch-size 64] [--repeat 3]
+"""
+import argparse
+import time
+
+from app.config import settings
+from app.services.encoders.factory import PARITY_SAMPLE, cosine_agreement
+from app.services.encoders.onnx_backend import OnnxBackend
+from app.services.encoders.torch_backend import TorchBackend
+
+
+def _throughput(backend, texts: list[str], batch_size: int, repeat: int) -> float:
+    backend.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        backend.encode(texts, batch_size=batch_size)
+    return len(texts) * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts-file", help="newline-separated texts; defaults to a built-in sample")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.texts_file:
+        with open(args.texts_file, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = PARITY_SAMPLE * 64
+
+    candidates = {
+        "torch": TorchBackend(settings.EMBEDDING_MODEL),
+        "onnx-fp32": OnnxBackend(settings.EMBEDDING_MODEL, settings.EMBEDDING_ONNX_CACHE_DIR, quantize=False),
+        "onnx-qint8": OnnxBackend(
+            settings.EMBEDDING_MODEL,
+            settings.EMBEDDING_ONNX_CACHE_DIR,
+            quantization_config=settings.EMBEDDING_ONNX_QUANTIZATION_CONFIG,
+        ),
+    }
+    reference = candidates["torch"].encode(texts, batch_size=args.batch_size)
+
+    print(f"{len(texts)} texts, batch size {args.batch_size}, {args.repeat} repeats")
+    print(f"{'backend':<12} {'texts/s':>10} {'min cos':>9} {'mean cos':>9}")
+    for name, backend in candidates.items():
+        agreement = cosine_agreement(reference, backend.encode(texts, batch_size=args.batch_size))
+        rate = _throughput(backend, texts, args.batch_size, args.repeat)
+        print(f"{name:<12} {rate:>10.1f} {agreement.min():>9.4f} {agreement.mean():>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import logging
+
+import numpy as np
+
+from app.config import settings
+from app.services.encoders.base import EmbeddingBackend
+
+logger = logging.getLogger(__name__)
+
+PARITY_SAMPLE = [
+    "How do I reset my password?",
+    "Error code E1042 when starting the pump controller",
+    "The quarterly report shows revenue growth across all regions.",
+    "Retention policy for archived customer emails",
+    "Part number 7731-B is compatible with the older housing.",
+    "What is the difference between HNSW and IVFFlat indexes?",
+    "Employees must complete safety training before operating machinery.",
+    "Summarize the main findings of the attached study.",
+]
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity between two embedding matrices."""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return np.sum(reference * candidate, axis=1)
+
+
+def parity_check(reference: EmbeddingBackend, candidate: EmbeddingBackend, texts: list[str] | None = None) -> float:
+    """Return the minimum cosine agreement of candidate vectors against the reference."""
+    texts = texts or PARITY_SAMPLE
+    return float(cosine_agreement(reference.encode(texts), candidate.encode(texts)).min())
+
+
+def get_embedding_backend(backend_name: str) -> EmbeddingBackend:
+    if backend_name == "torch":
+        from app.services.encoders.torch_backend import TorchBackend
+        return TorchBackend(settings.EMBEDDING_MODEL)
+    elif backend_name == "onnx":
+        from app.services.encoders.onnx_backend import OnnxBackend
+        backend = OnnxBackend(
+            settings.EMBEDDING_MODEL,
+            settings.EMBEDDING_ONNX_CACHE_DIR,
+            quantize=settings.EMBEDDING_ONNX_QUANTIZE,
+            quantization_config=settings.EMBEDDING_ONNX_QUANTIZATION_CONFIG,
+        )
+        if settings.EMBEDDING_PARITY_THRESHOLD > 0:
+            from app.services.encoders.torch_backend import TorchBackend
+            agreement = parity_check(TorchBackend(settings.EMBEDDING_MODEL), backend)
+            if agreement < settings.EMBEDDING_PARITY_THRESHOLD:
+                raise RuntimeError(
+                    f"ONNX backend parity {agreement:.4f} is below EMBEDDING_PARITY_THRESHOLD "
+                    f"{settings.EMBEDDING_PARITY_THRESHOLD}"
+                )
+            logger.info(f"ONNX backend parity check passed (min cosine {agreement:.4f})")
+        return backend
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend_name}")
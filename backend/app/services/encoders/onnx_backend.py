@@ -0,0 +1,56 @@
+import logging
+import os
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.services.encoders.base import EmbeddingBackend
+
+logger = logging.getLogger(__name__)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """SentenceTransformer running on ONNX Runtime, optionally int8-quantized.
+
+    The quantized graph is exported once into ``cache_dir`` and reused on
+    subsequent starts. Requires ``pip install -e .[onnx]``.
+    """
+
+    def __init__(self, model_name: str, cache_dir: str, quantize: bool = True, quantization_config: str = "avx2"):
+        self.model_name = model_name
+        self.quantize = quantize
+        self.quantization_config = quantization_config
+
+        if not quantize:
+            self.model = SentenceTransformer(model_name, backend="onnx")
+            return
+
+        save_dir = os.path.join(cache_dir, model_name.replace("/", "__"))
+        file_name = f"onnx/model_qint8_{quantization_config}.onnx"
+        if not os.path.exists(os.path.join(save_dir, file_name)):
+            self._export_quantized(save_dir)
+        self.model = SentenceTransformer(save_dir, backend="onnx", model_kwargs={"file_name": file_name})
+
+    def _export_quantized(self, save_dir: str):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        logger.info(f"Exporting int8 ONNX model ({self.quantization_config}) to {save_dir}")
+        model = SentenceTransformer(self.model_name, backend="onnx")
+        model.save(save_dir)
+        export_dynamic_quantized_onnx_model(model, self.quantization_config, save_dir)
+
+    @property
+    def model_id(self) -> str:
+        suffix = f"qint8-{self.quantization_config}" if self.quantize else "fp32"
+        return f"{self.model_name}@onnx-{suffix}"
+
+    def encode(self, texts, batch_size: int = 32, normalize_embeddings: bool = True) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, normalize_embeddings=normalize_embeddings)
+
+    @property
+    def tokenizer(self):
+        return self.model.tokenizer
+
+    @property
+    def max_seq_length(self) -> int:
+        return self.model.max_seq_length
@@ -0,0 +1,27 @@
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.services.encoders.base import EmbeddingBackend
+
+
+class TorchBackend(EmbeddingBackend):
+    """PyTorch eager-mode SentenceTransformer."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+
+    @property
+    def model_id(self) -> str:
+        return self.model_name
+
+    def encode(self, texts, batch_size: int = 32, normalize_embeddings: bool = True) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, normalize_embeddings=normalize_embeddings)
+
+    @property
+    def tokenizer(self):
+        return self.model.tokenizer
+
+    @property
+    def max_seq_length(self) -> int:
+        return self.model.max_seq_length
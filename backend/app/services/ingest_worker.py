@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from app.config import settings
+from app.database import async_session
+from app.models.job import IngestionJob
+from app.services.document_processor import process_document
+from app.services.job_queue import claim_jobs, complete_job, extend_lease, fail_job, release_job
+from app.services.progress import DocumentProgress
+
+logger = logging.getLogger(__name__)
+
+
+class IngestWorker:
+    """Claims ingestion jobs from Postgres and processes up to ``concurrency`` at a time."""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: set[asyncio.Task] = set()
+
+    async def run(self, stop: asyncio.Event):
+        logger.info(f"Ingest worker {self.worker_id} started (concurrency {self.concurrency})")
+        stop_wait = asyncio.create_task(stop.wait())
+        try:
+            while not stop.is_set():
+                claimed = []
+                free = self.concurrency - len(self._tasks)
+                if free > 0:
+                    try:
+                        async with async_session() as db:
+                            claimed = await claim_jobs(db, self.worker_id, free)
+                    except Exception:
+                        logger.exception("Failed to claim ingestion jobs")
+
+                for job in claimed:
+                    task = asyncio.create_task(self._run_job(job))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+
+                # Poll again immediately if there may be more work and room for it
+                if claimed and len(self._tasks) < self.concurrency:
+                    continue
+                await asyncio.wait(
+                    {stop_wait, *self._tasks},
+                    timeout=settings.INGEST_WORKER_POLL_SECONDS,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+        finally:
+            stop_wait.cancel()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            logger.info(f"Ingest worker {self.worker_id} stopped")
+
+    async def _heartbeat(self, job: IngestionJob):
+        while True:
+            await asyncio.sleep(settings.INGEST_JOB_LEASE_SECONDS / 3)
+            try:
+                async with async_session() as db:
+                    await extend_lease(db, job.id, self.worker_id)
+            except Exception:
+                logger.warning(f"Failed to extend lease for job {job.id}", exc_info=True)
+
+    async def _run_job(self, job: IngestionJob):
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await process_document(job.document_id)
+        except asyncio.CancelledError:
+            async with async_session() as db:
+                await release_job(db, job.id, self.worker_id)
+            raise
+        except Exception as e:
+            async with async_session() as db:
+                retry = await fail_job(db, job, self.worker_id, str(e))
+            if retry is not None:
+                DocumentProgress(job.document_id).publish("retrying" if retry else "failed", error=str(e))
+        else:
+            async with async_session() as db:
+                await complete_job(db, job.id, self.worker_id)
+        finally:
+            heartbeat.cancel()
@@ -0,0 +1,171 @@
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.document import Document, DocumentStatus
+from app.models.job import ACTIVE_STATUSES, IngestionJob, JobStatus
+from app.services.progress import DocumentProgress
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def enqueue_document(db: AsyncSession, document_id: uuid.UUID) -> IngestionJob:
+    """Add an ingestion job to the caller's transaction; it becomes visible on commit.
+
+    A document with a queued or running job keeps that job rather than
+    getting a second one; a unique partial index backs this up against
+    concurrent requests.
+    """
+    result = await db.execute(
+        select(IngestionJob).where(
+            IngestionJob.document_id == document_id,
+            IngestionJob.status.in_(ACTIVE_STATUSES),
+        )
+    )
+    job = result.scalars().first()
+    if job is not None:
+        return job
+    job = IngestionJob(
+        document_id=document_id,
+        status=JobStatus.QUEUED,
+        attempts=0,
+        max_attempts=settings.INGEST_JOB_MAX_ATTEMPTS,
+    )
+    db.add(job)
+    DocumentProgress(document_id).publish("queued")
+    return job
+
+
+async def claim_jobs(db: AsyncSession, worker_id: str, limit: int) -> list[IngestionJob]:
+    """Lease up to ``limit`` runnable jobs for this worker.
+
+    Runnable means queued and due, or running under a lease that has expired
+    (its worker died). Rows locked by other claimers are skipped, so any number
+    of workers can poll concurrently without handing out the same job twice.
+    A job whose lease expired on its final attempt fails along with its document.
+    """
+    now = _now()
+    stmt = (
+        select(IngestionJob)
+        .where(
+            or_(
+                and_(IngestionJob.status == JobStatus.QUEUED, IngestionJob.run_at <= now),
+                and_(IngestionJob.status == JobStatus.RUNNING, IngestionJob.lease_expires_at < now),
+            )
+        )
+        .order_by(IngestionJob.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(stmt)
+
+    claimed = []
+    abandoned = []
+    for job in result.scalars().all():
+        if job.status == JobStatus.RUNNING:
+            logger.warning(f"Recovering job {job.id} from expired lease held by {job.locked_by}")
+            if job.attempts >= job.max_attempts:
+                job.status = JobStatus.FAILED
+                job.last_error = "Lease expired on final attempt"
+                job.locked_by = None
+                job.lease_expires_at = None
+                abandoned.append(job.document_id)
+                continue
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.lease_expires_at = now + timedelta(seconds=settings.INGEST_JOB_LEASE_SECONDS)
+        claimed.append(job)
+
+    if abandoned:
+        await db.execute(
+            update(Document)
+            .where(Document.id.in_(abandoned))
+            .values(status=DocumentStatus.FAILED, error_message="Lease expired on final attempt")
+        )
+    await db.commit()
+    for document_id in abandoned:
+        DocumentProgress(document_id).publish("failed", error="Lease expired on final attempt")
+    return claimed
+
+
+async def extend_lease(db: AsyncSession, job_id: uuid.UUID, worker_id: str) -> None:
+    await db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job_id, IngestionJob.locked_by == worker_id)
+        .values(lease_expires_at=_now() + timedelta(seconds=settings.INGEST_JOB_LEASE_SECONDS))
+    )
+    await db.commit()
+
+
+async def complete_job(db: AsyncSession, job_id: uuid.UUID, worker_id: str) -> None:
+    result = await db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job_id, IngestionJob.locked_by == worker_id)
+        .values(status=JobStatus.SUCCEEDED, locked_by=None, lease_expires_at=None, last_error=None)
+    )
+    if result.rowcount == 0:
+        logger.warning(f"Job {job_id} finished after {worker_id} lost its lease")
+    await db.commit()
+
+
+async def fail_job(db: AsyncSession, job: IngestionJob, worker_id: str, error: str) -> bool | None:
+    """Reschedule with exponential backoff, or mark failed once attempts are exhausted.
+
+    The document stays pending between attempts, so uploads still dedupe
+    against it, and only fails with the job. Returns True if the job will be
+    retried, or None if this worker no longer holds the job (its lease
+    expired and another worker took over), in which case nothing changes.
+    """
+    retry = job.attempts < job.max_attempts
+    if retry:
+        delay = settings.INGEST_JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+        values = {"status": JobStatus.QUEUED, "run_at": _now() + timedelta(seconds=delay)}
+    else:
+        values = {"status": JobStatus.FAILED}
+
+    result = await db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job.id, IngestionJob.locked_by == worker_id)
+        .values(locked_by=None, lease_expires_at=None, last_error=error, **values)
+    )
+    if result.rowcount == 0:
+        logger.warning(f"Job {job.id} failed after {worker_id} lost its lease; leaving it to its new owner")
+        await db.rollback()
+        return None
+    if retry:
+        logger.info(f"Job {job.id} attempt {job.attempts} failed; retrying in {delay:.0f}s")
+    else:
+        logger.error(f"Job {job.id} failed after {job.attempts} attempts")
+
+    await db.execute(
+        update(Document)
+        .where(Document.id == job.document_id)
+        .values(status=DocumentStatus.PENDING if retry else DocumentStatus.FAILED, error_message=error)
+    )
+    await db.commit()
+    return retry
+
+
+async def release_job(db: AsyncSession, job_id: uuid.UUID, worker_id: str) -> None:
+    """Hand an interrupted job straight back to the queue (e.g. on worker shutdown)."""
+    await db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job_id, IngestionJob.locked_by == worker_id)
+        .values(
+            status=JobStatus.QUEUED,
+            attempts=IngestionJob.attempts - 1,
+            run_at=_now(),
+            locked_by=None,
+            lease_expires_at=None,
+        )
+    )
+    await db.commit()
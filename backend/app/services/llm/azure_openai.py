@@ -1,6 +1,7 @@
 import logging
 from typing import AsyncIterator
 
+import httpx
 from openai import AsyncAzureOpenAI
 
 from app.config import settings
@@ -10,11 +11,12 @@ logger = logging.getLogger(__name__)
 
 
 class AzureOpenAIProvider(LLMProvider):
-    def __init__(self):
+    def __init__(self, http_client: httpx.AsyncClient | None = None):
         self.client = AsyncAzureOpenAI(
             azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
             api_key=settings.AZURE_OPENAI_API_KEY,
             api_version=settings.AZURE_OPENAI_API_VERSION,
+            http_client=http_client,
         )
         self.deployment = settings.AZURE_OPENAI_DEPLOYMENT
 
@@ -46,3 +48,6 @@ class AzureOpenAIProvider(LLMProvider):
             return True
         except Exception:
             return False
+
+    async def aclose(self) -> None:
+        await self.client.close()
@@ -14,3 +14,6 @@ class LLMProvider(ABC):
     @abstractmethod
     async def health_check(self) -> bool:
         ...
+
+    async def aclose(self) -> None:
+        """Release pooled connections; providers are long-lived and closed at shutdown."""
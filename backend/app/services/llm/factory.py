@@ -1,12 +1,87 @@
+import importlib.util
+import logging
+
+import httpx
+
+from app.config import settings
 from app.services.llm.base import LLMProvider
 from app.services.llm.ollama import OllamaProvider
 from app.services.llm.azure_openai import AzureOpenAIProvider
 
+logger = logging.getLogger(__name__)
 
-def get_llm_provider(provider_name: str) -> LLMProvider:
+
+def _http2_enabled() -> bool:
+    if not settings.LLM_HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("LLM_HTTP2 is set but the 'h2' package is missing; using HTTP/1.1")
+        return False
+    return True
+
+
+def _http_client(**kwargs) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.LLM_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.LLM_CONNECT_TIMEOUT,
+            read=settings.LLM_READ_TIMEOUT,
+            write=10.0,
+            pool=10.0,
+        ),
+        # Negotiated via ALPN, so only TLS endpoints (Azure) actually get HTTP/2
+        http2=_http2_enabled(),
+        **kwargs,
+    )
+
+
+def _create_provider(provider_name: str) -> LLMProvider:
     if provider_name == "ollama":
-        return OllamaProvider()
+        return OllamaProvider(_http_client(base_url=settings.OLLAMA_BASE_URL))
     elif provider_name == "azure_openai":
-        return AzureOpenAIProvider()
+        return AzureOpenAIProvider(_http_client())
     else:
         raise ValueError(f"Unknown LLM provider: {provider_name}")
+
+
+class LLMProviderRegistry:
+    """One long-lived provider, and so one connection pool, per provider name.
+
+    Opened in the app lifespan and closed on shutdown; providers requested
+    outside the lifespan (e.g. from the worker CLI) are created on first use.
+    """
+
+    def __init__(self):
+        self._providers: dict[str, LLMProvider] = {}
+
+    def open(self) -> None:
+        self.get("ollama")
+        if settings.AZURE_OPENAI_ENDPOINT:
+            self.get("azure_openai")
+
+    def get(self, provider_name: str) -> LLMProvider:
+        provider = self._providers.get(provider_name)
+        if provider is None:
+            provider = _create_provider(provider_name)
+            self._providers[provider_name] = provider
+            logger.info(f"LLM provider '{provider_name}' initialized")
+        return provider
+
+    async def aclose(self) -> None:
+        providers, self._providers = self._providers, {}
+        for name, provider in providers.items():
+            try:
+                await provider.aclose()
+            except Exception:
+                logger.warning(f"Failed to close LLM provider '{name}'", exc_info=True)
+
+
+llm_registry = LLMProviderRegistry()
+
+
+def get_llm_provider(provider_name: str) -> LLMProvider:
+    return llm_registry.get(provider_name)
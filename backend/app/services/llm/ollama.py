@@ -11,47 +11,48 @@ logger = logging.getLogger(__name__)
 
 
 class OllamaProvider(LLMProvider):
-    def __init__(self):
+    def __init__(self, client: httpx.AsyncClient | None = None):
         self.base_url = settings.OLLAMA_BASE_URL
         self.model = settings.OLLAMA_MODEL
+        # Normally the registry's pooled client; a private one keeps ad-hoc construction working
+        self.client = client or httpx.AsyncClient(base_url=self.base_url, timeout=httpx.Timeout(300.0, connect=10.0))
 
     async def generate(self, messages: list[dict], **kwargs) -> str:
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            response = await client.post(
-                f"{self.base_url}/api/chat",
-                json={
-                    "model": kwargs.get("model", self.model),
-                    "messages": messages,
-                    "stream": False,
-                },
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data["message"]["content"]
+        response = await self.client.post(
+            "/api/chat",
+            json={
+                "model": kwargs.get("model", self.model),
+                "messages": messages,
+                "stream": False,
+            },
+        )
+        response.raise_for_status()
+        data = response.json()
+        return data["message"]["content"]
 
     async def generate_stream(self, messages: list[dict], **kwargs) -> AsyncIterator[str]:
-        timeout = httpx.Timeout(connect=10.0, read=300.0, write=10.0, pool=10.0)
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            async with client.stream(
-                "POST",
-                f"{self.base_url}/api/chat",
-                json={
-                    "model": kwargs.get("model", self.model),
-                    "messages": messages,
-                    "stream": True,
-                },
-            ) as response:
-                response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if line:
-                        data = json.loads(line)
-                        if "message" in data and "content" in data["message"]:
-                            yield data["message"]["content"]
+        async with self.client.stream(
+            "POST",
+            "/api/chat",
+            json={
+                "model": kwargs.get("model", self.model),
+                "messages": messages,
+                "stream": True,
+            },
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    data = json.loads(line)
+                    if "message" in data and "content" in data["message"]:
+                        yield data["message"]["content"]
 
     async def health_check(self) -> bool:
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(f"{self.base_url}/api/tags")
-                return resp.status_code == 200
+            resp = await self.client.get("/api/tags", timeout=5.0)
+            return resp.status_code == 200
         except Exception:
             return False
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,192 @@
+import asyncio
+import math
+import time
+import weakref
+from collections import OrderedDict, deque
+from typing import Hashable
+
+from app.config import settings
+from app.utils.metrics import Histogram
+
+# Bounds for the Retry-After hint given to rejected clients, in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 60
+
+
+class LLMQueueFull(Exception):
+    def __init__(self, provider_name: str, retry_after: int):
+        super().__init__(f"LLM provider '{provider_name}' is at capacity; retry in {retry_after}s")
+        self.provider_name = provider_name
+        self.retry_after = retry_after
+
+
+def _max_concurrency(provider_name: str) -> int:
+    if provider_name == "azure_openai":
+        return settings.AZURE_OPENAI_MAX_CONCURRENCY
+    return settings.OLLAMA_MAX_CONCURRENCY
+
+
+class LLMTicket:
+    """An admitted request's place in a provider queue.
+
+    ``async with ticket`` waits for a generation slot and frees it on exit;
+    ``cancel()`` gives up a ticket that will not be used. A ticket that is
+    dropped without either stops counting against the queue once it is
+    garbage-collected.
+    """
+
+    def __init__(self, queue: "ProviderQueue", key: Hashable):
+        self._queue = queue
+        self.key = key
+        self.wait_ms = 0.0
+        self._started_at: float | None = None
+
+    async def __aenter__(self) -> "LLMTicket":
+        await self._queue.acquire(self)
+        self._started_at = time.monotonic()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._started_at is not None:
+            held, self._started_at = time.monotonic() - self._started_at, None
+            self._queue.release(held)
+
+    def cancel(self) -> None:
+        self._queue.discard(self)
+
+
+class ProviderQueue:
+    """Concurrency limit plus a bounded wait queue for one provider.
+
+    Slots are handed out round-robin across keys (chat sessions), so a
+    session sending a burst of messages cannot starve the others. The bound
+    applies at admission: tickets that are admitted but not yet running
+    count against it, so requests are rejected up front rather than once
+    their response has started streaming.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_queue = max(max_queue, 0)
+        self.active = 0
+        self._admitted: weakref.WeakSet[LLMTicket] = weakref.WeakSet()
+        self._waiting: OrderedDict[Hashable, deque[asyncio.Future]] = OrderedDict()
+        self._hold_seconds = 0.0
+        self.accepted = 0
+        self.rejected = 0
+        self.wait_ms = Histogram([1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000])
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiting.values())
+
+    def retry_after(self) -> int:
+        # Time for the backlog to drain at the observed generation length
+        hold = self._hold_seconds or 1.0
+        seconds = math.ceil(hold * (len(self._admitted) + 1) / self.max_concurrency)
+        return min(max(seconds, MIN_RETRY_AFTER), MAX_RETRY_AFTER)
+
+    def reserve(self, key: Hashable) -> LLMTicket:
+        free = self.max_concurrency - self.active
+        if len(self._admitted) >= self.max_queue + free:
+            self.rejected += 1
+            raise LLMQueueFull(self.name, self.retry_after())
+        ticket = LLMTicket(self, key)
+        self._admitted.add(ticket)
+        self.accepted += 1
+        return ticket
+
+    def discard(self, ticket: LLMTicket) -> None:
+        self._admitted.discard(ticket)
+
+    async def acquire(self, ticket: LLMTicket) -> None:
+        start = time.perf_counter()
+        try:
+            if self.active < self.max_concurrency and not self._waiting:
+                self.active += 1
+            else:
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiting.setdefault(ticket.key, deque()).append(waiter)
+                try:
+                    await waiter
+                except asyncio.CancelledError:
+                    if waiter.done() and not waiter.cancelled():
+                        # The slot was handed over just as we were cancelled
+                        self.release()
+                    else:
+                        self._remove_waiter(ticket.key, waiter)
+                    raise
+        finally:
+            self._admitted.discard(ticket)
+        ticket.wait_ms = round((time.perf_counter() - start) * 1000, 2)
+        self.wait_ms.observe(ticket.wait_ms)
+
+    def release(self, held: float | None = None) -> None:
+        self.active -= 1
+        if held is not None:
+            # Slow-moving average of how long a generation holds its slot
+            self._hold_seconds = held if not self._hold_seconds else 0.8 * self._hold_seconds + 0.2 * held
+        self._dispatch()
+
+    def _remove_waiter(self, key: Hashable, waiter: asyncio.Future) -> None:
+        waiters = self._waiting.get(key)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(waiter)
+        except ValueError:
+            pass
+        if not waiters:
+            del self._waiting[key]
+
+    def _dispatch(self) -> None:
+        while self.active < self.max_concurrency and self._waiting:
+            # Take the oldest waiter of the least recently served key, then rotate that key to the back
+            key, waiters = next(iter(self._waiting.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiting.move_to_end(key)
+            else:
+                del self._waiting[key]
+            if waiter.done():
+                continue
+            self.active += 1
+            waiter.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": len(self._admitted),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "avg_generation_seconds": round(self._hold_seconds, 3),
+            "wait_ms": self.wait_ms.snapshot(),
+        }
+
+
+class LLMScheduler:
+    """Per-provider admission control in front of the LLM providers."""
+
+    def __init__(self):
+        self._queues: dict[str, ProviderQueue] = {}
+
+    def queue(self, provider_name: str) -> ProviderQueue:
+        queue = self._queues.get(provider_name)
+        if queue is None:
+            queue = ProviderQueue(provider_name, _max_concurrency(provider_name), settings.LLM_QUEUE_SIZE)
+            self._queues[provider_name] = queue
+        return queue
+
+    def reserve(self, provider_name: str, key: Hashable) -> LLMTicket:
+        """Admit a request or raise LLMQueueFull; the caller must use or cancel the ticket."""
+        return self.queue(provider_name).reserve(key)
+
+    def stats(self) -> dict:
+        return {name: queue.stats() for name, queue in self._queues.items()}
+
+
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,144 @@
+import hashlib
+import re
+import uuid
+from functools import lru_cache
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.document import Chunk
+
+# Mersenne prime for the universal hash family; keeps a * x within uint64
+_PRIME = (1 << 31) - 1
+SHINGLE_WORDS = 3
+_TOKEN = re.compile(r"\w+")
+
+
+def _hash32(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=4).digest(), "little")
+
+
+@lru_cache(maxsize=4)
+def _permutations(num_perm: int) -> tuple[np.ndarray, np.ndarray]:
+    # Derived from fixed labels so signatures are stable across processes and releases
+    a = np.array([_hash32(f"localrag-minhash-a:{i}".encode()) % (_PRIME - 1) + 1 for i in range(num_perm)], dtype=np.uint64)
+    b = np.array([_hash32(f"localrag-minhash-b:{i}".encode()) % _PRIME for i in range(num_perm)], dtype=np.uint64)
+    return a, b
+
+
+@lru_cache(maxsize=4)
+def lsh_params(threshold: float, num_perm: int) -> tuple[int, int]:
+    """Pick (bands, rows) whose S-curve midpoint (1/b)^(1/r) is closest to the threshold from below.
+
+    Erring low trades extra candidates, which are verified, for fewer misses.
+    """
+    best = (1, num_perm)
+    best_gap = float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        if midpoint <= threshold and threshold - midpoint < best_gap:
+            best, best_gap = (bands, rows), threshold - midpoint
+    return best
+
+
+def shingles(text: str) -> set[bytes]:
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) < SHINGLE_WORDS:
+        return {" ".join(tokens).encode()}
+    return {" ".join(tokens[i:i + SHINGLE_WORDS]).encode() for i in range(len(tokens) - SHINGLE_WORDS + 1)}
+
+
+def minhash_signature(text: str, num_perm: int | None = None) -> np.ndarray:
+    num_perm = num_perm or settings.NEAR_DUP_NUM_PERM
+    a, b = _permutations(num_perm)
+    x = np.fromiter((_hash32(s) % _PRIME for s in shingles(text)), dtype=np.uint64)
+    return ((np.outer(a, x) + b[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def band_hashes(signature: np.ndarray, threshold: float | None = None) -> list[int]:
+    """One signed 64-bit bucket per band; the band layout is folded in so configs never collide."""
+    threshold = threshold or settings.NEAR_DUP_THRESHOLD
+    bands, rows = lsh_params(threshold, len(signature))
+    buckets = []
+    for band in range(bands):
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(f"{len(signature)}:{rows}:{band}:".encode())
+        digest.update(signature[band * rows:(band + 1) * rows].tobytes())
+        buckets.append(int.from_bytes(digest.digest(), "little", signed=True))
+    return buckets
+
+
+def jaccard_estimate(a: np.ndarray, b: np.ndarray) -> float:
+    if len(a) != len(b):
+        return 0.0
+    return float(np.mean(a == b))
+
+
+class NearDuplicateIndex:
+    """Resolves chunk rows of one ingest run to canonical chunks.
+
+    Candidates come from the LSH bands stored on canonical chunks of other
+    documents (GIN overlap query) and from rows already accepted in this run;
+    every candidate is verified against the signature before it is used.
+    """
+
+    def __init__(self, document_id: uuid.UUID, model_id: str):
+        self.document_id = document_id
+        self.model_id = model_id
+        self.threshold = settings.NEAR_DUP_THRESHOLD
+        self._buckets: dict[int, list[tuple[uuid.UUID, np.ndarray]]] = {}
+        self.duplicates = 0
+
+    def _remember(self, chunk_id: uuid.UUID, signature: np.ndarray, buckets: list[int]):
+        for bucket in buckets:
+            self._buckets.setdefault(bucket, []).append((chunk_id, signature))
+
+    async def _stored_candidates(self, db: AsyncSession, buckets: list[int]) -> dict[int, list]:
+        if not buckets:
+            return {}
+        result = await db.execute(
+            select(Chunk.id, Chunk.minhash, Chunk.lsh_bands).where(
+                Chunk.lsh_bands.overlap(buckets),
+                Chunk.canonical_chunk_id.is_(None),
+                Chunk.embedding.is_not(None),
+                Chunk.embedding_model == self.model_id,
+                Chunk.document_id != self.document_id,
+            )
+        )
+        wanted = set(buckets)
+        candidates: dict[int, list] = {}
+        for row in result.all():
+            signature = np.frombuffer(row.minhash, dtype=np.uint32)
+            for bucket in wanted.intersection(row.lsh_bands):
+                candidates.setdefault(bucket, []).append((row.id, signature))
+        return candidates
+
+    async def resolve(self, db: AsyncSession, rows: list[dict]) -> None:
+        """Sign each row and point near-duplicates at their canonical chunk.
+
+        Rows must carry ``id`` and ``content``; ``minhash``, ``lsh_bands`` and
+        ``canonical_chunk_id`` are filled in place.
+        """
+        for row in rows:
+            signature = minhash_signature(row["content"])
+            row["minhash"] = signature.tobytes()
+            row["lsh_bands"] = band_hashes(signature, self.threshold)
+
+        stored = await self._stored_candidates(db, sorted({b for row in rows for b in row["lsh_bands"]}))
+
+        for row in rows:
+            signature = np.frombuffer(row["minhash"], dtype=np.uint32)
+            best_id, best_score = None, self.threshold
+            for bucket in row["lsh_bands"]:
+                for candidate_id, candidate in stored.get(bucket, []) + self._buckets.get(bucket, []):
+                    score = jaccard_estimate(signature, candidate)
+                    if score >= best_score:
+                        best_id, best_score = candidate_id, score
+            if best_id is not None:
+                row["canonical_chunk_id"] = best_id
+                self.duplicates += 1
+            else:
+                self._remember(row["id"], signature, row["lsh_bands"])
@@ -0,0 +1,136 @@
+import asyncio
+import time
+import uuid
+from typing import AsyncIterator
+
+from app.config import settings
+from app.utils.cache import TTLCache
+
+TERMINAL_STAGES = ("completed", "failed")
+
+
+class ProgressBroker:
+    """In-process pub/sub for document ingestion progress.
+
+    Events are cumulative snapshots, so a slow subscriber only ever loses
+    intermediate states: its queue drops the oldest event when full. The
+    latest event per document is kept so late subscribers start current.
+    """
+
+    def __init__(self, queue_size: int, retain: int, retain_ttl: float):
+        self.queue_size = queue_size
+        self._latest = TTLCache(retain, retain_ttl)
+        self._subscribers: dict[uuid.UUID, set[asyncio.Queue]] = {}
+
+    def publish(self, document_id: uuid.UUID, stage: str, **counts) -> dict:
+        event = {"document_id": str(document_id), "stage": stage, **counts, "ts": time.time()}
+        self._latest.set(document_id, event)
+        for queue in self._subscribers.get(document_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+        return event
+
+    def latest(self, document_id: uuid.UUID) -> dict | None:
+        return self._latest.get(document_id)
+
+    def subscribe(self, document_ids: list[uuid.UUID]) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        for document_id in document_ids:
+            self._subscribers.setdefault(document_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, document_ids: list[uuid.UUID], queue: asyncio.Queue) -> None:
+        for document_id in document_ids:
+            queues = self._subscribers.get(document_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[document_id]
+
+    def stats(self) -> dict:
+        return {
+            "documents_watched": len(self._subscribers),
+            "subscriptions": sum(len(queues) for queues in self._subscribers.values()),
+        }
+
+
+class DocumentProgress:
+    """Running counters for one process_document run, published at stage boundaries."""
+
+    def __init__(self, document_id: uuid.UUID, broker: "ProgressBroker | None" = None):
+        self.document_id = document_id
+        self.broker = broker or progress_broker
+        self.extracted_pages = 0
+        self.chunks_produced = 0
+        self.chunks_reused = 0
+        self.chunks_embedded = 0
+        self.rows_written = 0
+
+    def count_pages(self, pages):
+        """Wrap a page iterator so pages are counted as the extractor yields them."""
+        for page in pages:
+            self.extracted_pages += 1
+            yield page
+
+    def publish(self, stage: str, **extra) -> dict:
+        return self.broker.publish(
+            self.document_id,
+            stage,
+            extracted_pages=self.extracted_pages,
+            chunks_produced=self.chunks_produced,
+            chunks_reused=self.chunks_reused,
+            chunks_embedded=self.chunks_embedded,
+            rows_written=self.rows_written,
+            **extra,
+        )
+
+
+async def iter_progress(
+    document_ids: list[uuid.UUID],
+    initial: dict[uuid.UUID, dict],
+    poll,
+) -> AsyncIterator[dict | None]:
+    """Yield progress events until every document reaches a terminal stage.
+
+    ``initial`` holds a snapshot per document (from the database) used when
+    the broker has nothing newer. ``poll`` is awaited with the ids still
+    pending whenever no event arrives for INGEST_PROGRESS_POLL_SECONDS and
+    returns fresh snapshots; it covers documents processed by a standalone
+    worker, whose events never reach this process. None is yielded after
+    an idle poll so the caller can send a keep-alive.
+    """
+    queue = progress_broker.subscribe(document_ids)
+    try:
+        pending = set(document_ids)
+        for document_id in document_ids:
+            event = progress_broker.latest(document_id) or initial[document_id]
+            yield event
+            if event["stage"] in TERMINAL_STAGES:
+                pending.discard(document_id)
+
+        while pending:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.INGEST_PROGRESS_POLL_SECONDS)
+                events = [event]
+            except asyncio.TimeoutError:
+                snapshots = await poll(list(pending))
+                events = [e for e in snapshots if e["stage"] in TERMINAL_STAGES]
+                if not events:
+                    yield None
+            for event in events:
+                document_id = uuid.UUID(event["document_id"])
+                if document_id not in pending:
+                    continue
+                yield event
+                if event["stage"] in TERMINAL_STAGES:
+                    pending.discard(document_id)
+    finally:
+        progress_broker.unsubscribe(document_ids, queue)
+
+
+progress_broker = ProgressBroker(
+    settings.INGEST_PROGRESS_QUEUE_SIZE,
+    retain=1000,
+    retain_ttl=3600,
+)
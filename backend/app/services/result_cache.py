@@ -0,0 +1,257 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any
+
+import numpy as np
+from sqlalchemy import select, text
+
+from app.config import settings
+from app.database import async_session
+from app.models.document import corpus_version_seq
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "localrag:corpus_version"
+RESULT_KEY_PREFIX = "localrag:search:"
+
+# Result fields stored as UUIDs; JSON turns them into strings
+_UUID_FIELDS = ("chunk_id", "document_id")
+
+
+class ResultCacheBackend(ABC):
+    """Storage for search results plus the corpus version they were computed against."""
+
+    @abstractmethod
+    async def get(self, key: str) -> list[dict] | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: list[dict]) -> None:
+        ...
+
+    @abstractmethod
+    async def get_version(self) -> int:
+        ...
+
+    @abstractmethod
+    async def bump_version(self) -> int:
+        ...
+
+
+class PostgresCorpusVersion:
+    """Corpus version kept in a Postgres sequence.
+
+    Backends whose own storage is per process use it, so ingestion in a
+    standalone worker or the bulk CLI invalidates every API process.
+    nextval is not transactional: a bump is visible to all readers at once.
+    The value read is reused for ``ttl`` seconds, so a bump from another
+    process is seen within that window; a bump from this one immediately.
+    """
+
+    def __init__(self, ttl: float = 0.0):
+        self.ttl = ttl
+        self._value: int | None = None
+        self._expires_at = 0.0
+
+    def _remember(self, value: int) -> int:
+        self._value, self._expires_at = value, time.monotonic() + self.ttl
+        return value
+
+    async def get(self) -> int:
+        if self._value is not None and time.monotonic() < self._expires_at:
+            return self._value
+        async with async_session() as db:
+            result = await db.execute(text(
+                f"SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {corpus_version_seq.name}"
+            ))
+            return self._remember(int(result.scalar_one()))
+
+    async def bump(self) -> int:
+        async with async_session() as db:
+            result = await db.execute(select(corpus_version_seq.next_value()))
+            await db.commit()
+            return self._remember(int(result.scalar_one()))
+
+
+class InProcessResultCache(ResultCacheBackend):
+    """Per-worker results; the corpus version is shared through Postgres."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self._cache = TTLCache(max_size, ttl)
+        self._version = PostgresCorpusVersion(settings.SEARCH_CACHE_VERSION_TTL)
+
+    async def get(self, key: str) -> list[dict] | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: list[dict]) -> None:
+        self._cache.set(key, value)
+
+    async def get_version(self) -> int:
+        return await self._version.get()
+
+    async def bump_version(self) -> int:
+        return await self._version.bump()
+
+
+class LocalSharedClient:
+    """In-memory stand-in for the subset of the Redis client API used here."""
+
+    def __init__(self):
+        self._data: dict[str, tuple[float, Any]] = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self, key: str):
+        async with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    async def set(self, key: str, value, ex: int | None = None):
+        async with self._lock:
+            expires_at = time.monotonic() + ex if ex else 0.0
+            self._data[key] = (expires_at, value)
+
+    async def incr(self, key: str) -> int:
+        async with self._lock:
+            _, value = self._data.get(key, (0.0, 0))
+            value = int(value) + 1
+            self._data[key] = (0.0, value)
+            return value
+
+
+def _restore_ids(item: dict) -> dict:
+    for field in _UUID_FIELDS:
+        if isinstance(item.get(field), str):
+            item[field] = uuid.UUID(item[field])
+    for duplicate in item.get("duplicates") or []:
+        _restore_ids(duplicate)
+    return item
+
+
+class SharedResultCache(ResultCacheBackend):
+    """Cache shared across workers through a Redis-compatible client.
+
+    The corpus version lives in the shared store so that an ingest on any
+    worker invalidates results cached by every other worker; a client that
+    is not actually shared (LocalSharedClient) takes it from ``version``.
+    Ids come back as UUIDs, as from the database, so hits fuse and merge
+    with uncached results.
+    """
+
+    def __init__(self, client, ttl: float, version: PostgresCorpusVersion | None = None):
+        self.client = client
+        self.ttl = int(ttl) or None
+        self.version = version
+
+    async def get(self, key: str) -> list[dict] | None:
+        raw = await self.client.get(RESULT_KEY_PREFIX + key)
+        if raw is None:
+            return None
+        return [_restore_ids(item) for item in json.loads(raw)]
+
+    async def set(self, key: str, value: list[dict]) -> None:
+        await self.client.set(RESULT_KEY_PREFIX + key, json.dumps(value, default=str), ex=self.ttl)
+
+    async def get_version(self) -> int:
+        if self.version is not None:
+            return await self.version.get()
+        raw = await self.client.get(VERSION_KEY)
+        return int(raw) if raw is not None else 0
+
+    async def bump_version(self) -> int:
+        if self.version is not None:
+            return await self.version.bump()
+        return int(await self.client.incr(VERSION_KEY))
+
+
+class SearchResultCache:
+    """Front for the configured backend that also tracks hit/miss counters."""
+
+    def __init__(self, backend: ResultCacheBackend | None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def make_key(embedding: list[float], version: int, **params) -> str:
+        digest = hashlib.sha256(np.asarray(embedding, dtype=np.float32).tobytes())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return f"v{version}:{digest.hexdigest()}"
+
+    async def get(self, key: str) -> list[dict] | None:
+        try:
+            value = await self.backend.get(key)
+        except Exception:
+            logger.warning("Search result cache read failed", exc_info=True)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: list[dict]) -> None:
+        try:
+            await self.backend.set(key, value)
+        except Exception:
+            logger.warning("Search result cache write failed", exc_info=True)
+
+    async def get_version(self) -> int:
+        return await self.backend.get_version()
+
+    async def bump_version(self) -> None:
+        """Invalidate every cached result; call after any change to the chunks table."""
+        if not self.enabled:
+            return
+        try:
+            version = await self.backend.bump_version()
+            logger.info(f"Corpus version bumped to {version}")
+        except Exception:
+            logger.exception("Failed to bump corpus version")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": settings.SEARCH_CACHE_BACKEND,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def _create_backend() -> ResultCacheBackend | None:
+    backend = settings.SEARCH_CACHE_BACKEND
+    if backend == "memory":
+        return InProcessResultCache(settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL)
+    elif backend == "local":
+        version = PostgresCorpusVersion(settings.SEARCH_CACHE_VERSION_TTL)
+        return SharedResultCache(LocalSharedClient(), settings.SEARCH_CACHE_TTL, version)
+    elif backend == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("SEARCH_CACHE_BACKEND=redis requires the 'redis' package") from e
+        client = redis.from_url(settings.SEARCH_CACHE_URL)
+        return SharedResultCache(client, settings.SEARCH_CACHE_TTL)
+    elif backend == "none":
+        return None
+    else:
+        raise ValueError(f"Unknown search cache backend: {backend}")
+
+
+search_result_cache = SearchResultCache(_create_backend())
@@ -1,8 +1,53 @@
-from sqlalchemy import select, text
+import asyncio
+import time
+
+from sqlalchemy import cast, func, select
+from sqlalchemy.dialects.postgresql import REGCONFIG
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
+from app.database import async_session
 from app.models.document import Chunk, Document
 from app.services.embedding import embedding_service
+from app.services.result_cache import search_result_cache
+
+
+async def _apply_ann_params(
+    db: AsyncSession,
+    top_k: int,
+    ef_search: int | None = None,
+    probes: int | None = None,
+) -> None:
+    """Set transaction-local recall knobs for the ANN index in use."""
+    if settings.VECTOR_INDEX_TYPE == "hnsw":
+        # ef_search below top_k would silently truncate the result set
+        value = max(ef_search or settings.HNSW_EF_SEARCH, top_k)
+        await db.execute(select(func.set_config("hnsw.ef_search", str(value), True)))
+    elif settings.VECTOR_INDEX_TYPE == "ivfflat":
+        value = probes or settings.IVFFLAT_PROBES
+        await db.execute(select(func.set_config("ivfflat.probes", str(value), True)))
+
+
+async def expand_duplicates(db: AsyncSession, results: list[dict]) -> list[dict]:
+    """Attach the near-duplicate chunks that reference each result, with their source documents."""
+    if not results:
+        return results
+    stmt = (
+        select(Chunk.id, Chunk.canonical_chunk_id, Chunk.document_id, Chunk.chunk_index, Document.filename)
+        .join(Document, Chunk.document_id == Document.id)
+        .where(Chunk.canonical_chunk_id.in_([r["chunk_id"] for r in results]))
+        .order_by(Chunk.canonical_chunk_id, Document.created_at, Chunk.chunk_index)
+    )
+    result = await db.execute(stmt)
+    duplicates: dict = {}
+    for row in result.all():
+        duplicates.setdefault(row.canonical_chunk_id, []).append({
+            "chunk_id": row.id,
+            "document_id": row.document_id,
+            "filename": row.filename,
+            "chunk_index": row.chunk_index,
+        })
+    return [{**r, "duplicates": duplicates.get(r["chunk_id"], [])} for r in results]
 
 
 async def vector_search(
@@ -10,11 +55,92 @@ async def vector_search(
     query: str,
     top_k: int = 5,
     threshold: float = 0.3,
+    ef_search: int | None = None,
+    probes: int | None = None,
 ) -> list[dict]:
     """Perform vector similarity search on chunks."""
-    query_embedding = embedding_service.embed_single(query)
+    query_embedding = await embedding_service.aembed_single(query)
+
+    cache_key = None
+    if search_result_cache.enabled:
+        # Version is read before querying so a concurrent ingest can only
+        # leave results under a key that is already stale.
+        version = await search_result_cache.get_version()
+        cache_key = search_result_cache.make_key(
+            query_embedding,
+            version,
+            top_k=top_k,
+            threshold=threshold,
+            ef_search=ef_search,
+            probes=probes,
+        )
+        cached = await search_result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    await _apply_ann_params(db, top_k, ef_search, probes)
 
     # Cosine distance: lower is more similar. Score = 1 - distance.
+    # The inner query is a bare ORDER BY distance LIMIT k so the planner can
+    # walk the ANN index; the threshold is applied to that candidate set.
+    distance = Chunk.embedding.cosine_distance(query_embedding).label("distance")
+    nearest = (
+        select(
+            Chunk.id,
+            Chunk.document_id,
+            Chunk.chunk_index,
+            Chunk.content,
+            distance,
+        )
+        .order_by(distance)
+        .limit(top_k)
+        .subquery()
+    )
+
+    stmt = (
+        select(
+            nearest.c.id,
+            nearest.c.document_id,
+            nearest.c.chunk_index,
+            nearest.c.content,
+            Document.filename,
+            (1 - nearest.c.distance).label("score"),
+        )
+        .join(Document, nearest.c.document_id == Document.id)
+        .where(nearest.c.distance <= 1 - threshold)
+        .order_by(nearest.c.distance)
+    )
+
+    result = await db.execute(stmt)
+    rows = result.all()
+
+    results = [
+        {
+            "chunk_id": row.id,
+            "document_id": row.document_id,
+            "chunk_index": row.chunk_index,
+            "content": row.content,
+            "filename": row.filename,
+            "score": round(float(row.score), 4),
+        }
+        for row in rows
+    ]
+    results = await expand_duplicates(db, results)
+
+    if cache_key is not None:
+        await search_result_cache.set(cache_key, results)
+    return results
+
+
+async def lexical_search(
+    db: AsyncSession,
+    query: str,
+    top_k: int = 5,
+) -> list[dict]:
+    """Perform full-text search on chunks using the GIN-indexed tsvector."""
+    ts_query = func.websearch_to_tsquery(cast(settings.FTS_CONFIG, REGCONFIG), query)
+    rank = func.ts_rank_cd(Chunk.content_tsv, ts_query).label("score")
+
     stmt = (
         select(
             Chunk.id,
@@ -22,22 +148,18 @@ async def vector_search(
             Chunk.chunk_index,
             Chunk.content,
             Document.filename,
-            (1 - Chunk.embedding.cosine_distance(query_embedding)).label("score"),
+            rank,
         )
         .join(Document, Chunk.document_id == Document.id)
-        .where(
-            (1 - Chunk.embedding.cosine_distance(query_embedding)) >= threshold
-        )
-        .order_by(
-            Chunk.embedding.cosine_distance(query_embedding)
-        )
+        .where(Chunk.content_tsv.op("@@")(ts_query))
+        .order_by(rank.desc())
         .limit(top_k)
     )
 
     result = await db.execute(stmt)
     rows = result.all()
 
-    return [
+    results = [
         {
             "chunk_id": row.id,
             "document_id": row.document_id,
@@ -48,3 +170,67 @@ async def vector_search(
         }
         for row in rows
     ]
+    return await expand_duplicates(db, results)
+
+
+def reciprocal_rank_fusion(result_lists: list[list[dict]], top_k: int, k: int = 60) -> list[dict]:
+    """Fuse ranked result lists; each list contributes 1 / (k + rank) per chunk."""
+    fused: dict = {}
+    scores: dict = {}
+    for results in result_lists:
+        for rank, item in enumerate(results, start=1):
+            chunk_id = item["chunk_id"]
+            fused.setdefault(chunk_id, item)
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [{**fused[chunk_id], "score": round(scores[chunk_id], 6)} for chunk_id in ranked]
+
+
+async def _timed(coro) -> tuple[list[dict], float]:
+    start = time.perf_counter()
+    results = await coro
+    return results, (time.perf_counter() - start) * 1000
+
+
+async def _vector_leg(query: str, top_k: int, threshold: float, ef_search: int | None, probes: int | None):
+    async with async_session() as db:
+        return await vector_search(db, query, top_k, threshold, ef_search=ef_search, probes=probes)
+
+
+async def _lexical_leg(query: str, top_k: int):
+    async with async_session() as db:
+        return await lexical_search(db, query, top_k)
+
+
+async def hybrid_search(
+    query: str,
+    top_k: int = 5,
+    threshold: float = 0.3,
+    ef_search: int | None = None,
+    probes: int | None = None,
+) -> tuple[list[dict], dict[str, float]]:
+    """Run the ANN and full-text legs concurrently and fuse them with RRF.
+
+    Each leg runs on its own session so the queries overlap on the server.
+    Returns the fused results and per-leg timings in milliseconds.
+    """
+    start = time.perf_counter()
+    candidates = max(top_k, settings.HYBRID_CANDIDATES)
+
+    (vector_results, vector_ms), (lexical_results, lexical_ms) = await asyncio.gather(
+        _timed(_vector_leg(query, candidates, threshold, ef_search, probes)),
+        _timed(_lexical_leg(query, candidates)),
+    )
+
+    fusion_start = time.perf_counter()
+    results = reciprocal_rank_fusion([vector_results, lexical_results], top_k, settings.RRF_K)
+    end = time.perf_counter()
+
+    timings = {
+        "vector_ms": round(vector_ms, 2),
+        "lexical_ms": round(lexical_ms, 2),
+        "fusion_ms": round((end - fusion_start) * 1000, 2),
+        "total_ms": round((end - start) * 1000, 2),
+    }
+    return results, timings
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Iterable, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+async def aiter_in_thread(iterable: Iterable[T], max_buffer: int = 64) -> AsyncIterator[T]:
+    """Drive a blocking iterable in a worker thread and yield its items asynchronously.
+
+    The hand-off queue is bounded, so a slow consumer applies backpressure
+    to the producer instead of letting items pile up in memory. Consume it
+    under ``contextlib.aclosing`` when the loop can exit early: otherwise the
+    producer stays blocked on the full queue until the generator is
+    garbage-collected.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffer)
+    cancelled = threading.Event()
+
+    def put(item) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def produce():
+        try:
+            for item in iterable:
+                if cancelled.is_set():
+                    return
+                put((item, None))
+        except BaseException as e:
+            put((_DONE, e))
+            return
+        put((_DONE, None))
+
+    loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                break
+            yield item
+    finally:
+        cancelled.set()
+        # Unblock a producer waiting on a full queue so the thread can exit
+        while not queue.empty():
+            queue.get_nowait()
@@ -1,63 +1,153 @@
-def chunk_text(text: str, chunk_size: int = 512, chunk_overlap: int = 50) -> list[str]:
+from itertools import repeat
+from typing import Callable, Iterable, Iterator
+
+SEPARATORS = ["\n\n", "\n", ". ", " "]
+
+# Maps a batch of strings to their sizes; sizes are what chunk_size/chunk_overlap are measured in
+TokenCounter = Callable[[list[str]], list[int]]
+PageSpan = tuple[int | None, int | None]
+
+
+def count_words(texts: list[str]) -> list[int]:
+    return [len(t.split()) for t in texts]
+
+
+def tokenizer_counter(tokenizer) -> TokenCounter:
+    """Count sizes with a Hugging Face tokenizer (no special tokens), one batched call per level."""
+    def count(texts: list[str]) -> list[int]:
+        if not texts:
+            return []
+        return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+    return count
+
+
+def chunk_text(
+    text: str,
+    chunk_size: int = 512,
+    chunk_overlap: int = 50,
+    count_tokens: TokenCounter | None = None,
+) -> list[str]:
     """Split text into overlapping chunks using a recursive strategy.
 
     Splits by paragraph first, then sentence, then word boundaries.
-    chunk_size and chunk_overlap are in approximate word counts.
+    chunk_size and chunk_overlap are in approximate word counts unless a
+    tokenizer-based ``count_tokens`` is given.
+    """
+    return list(iter_chunks([text], chunk_size, chunk_overlap, count_tokens))
+
+
+def iter_chunks(
+    segments: Iterable[str],
+    chunk_size: int = 512,
+    chunk_overlap: int = 50,
+    count_tokens: TokenCounter | None = None,
+) -> Iterator[str]:
+    """Stream chunks from text segments treated as consecutive paragraphs."""
+    pages = zip(repeat(None), segments)
+    for chunk, _, _ in chunk_pages(pages, chunk_size, chunk_overlap, count_tokens):
+        yield chunk
+
+
+def chunk_pages(
+    pages: Iterable[tuple[int | None, str]],
+    chunk_size: int = 512,
+    chunk_overlap: int = 50,
+    count_tokens: TokenCounter | None = None,
+) -> Iterator[tuple[str, int | None, int | None]]:
+    """Stream chunks from (page number, text) units as they arrive.
+
+    Each part is measured once per separator level and the packer keeps
+    running totals, so work is linear in the input. Chunks may span a page
+    boundary and are yielded with the first and last page they draw from
+    (None for unpaginated input). Each page is split into parts on its own;
+    with word counting the output matches splitting "\\n\\n".join(page
+    texts) in one piece only when no page text ends with a newline.
     """
-    if not text.strip():
-        return []
+    counter = count_tokens or count_words
+
+    def top_level_parts():
+        for page_number, text in pages:
+            parts = text.split(SEPARATORS[0])
+            for part, size in zip(parts, counter(parts)):
+                yield part, size, (page_number, page_number)
+
+    yield from _pack(top_level_parts(), 0, chunk_size, chunk_overlap, counter, count_tokens is None)
+
+
+def with_sizes(
+    chunks: Iterable[tuple[str, int | None, int | None]],
+    count_tokens: TokenCounter | None = None,
+) -> Iterator[tuple[str, int | None, int | None, int]]:
+    """Append each chunk's size, measured with the counter it was chunked with."""
+    counter = count_tokens or count_words
+    for content, page_start, page_end in chunks:
+        yield content, page_start, page_end, counter([content])[0]
 
-    separators = ["\n\n", "\n", ". ", " "]
-    return _recursive_split(text, separators, chunk_size, chunk_overlap)
 
+def _merge_spans(spans: list[PageSpan]) -> PageSpan:
+    starts = [s for s, _ in spans if s is not None]
+    ends = [e for _, e in spans if e is not None]
+    return (min(starts) if starts else None, max(ends) if ends else None)
 
-def _recursive_split(text: str, separators: list[str], chunk_size: int, chunk_overlap: int) -> list[str]:
-    chunks: list[str] = []
-    separator = separators[0]
-    remaining_separators = separators[1:]
 
-    parts = text.split(separator)
+def _joined_size(parts: list[tuple[str, int, PageSpan]], separator: str, words: bool) -> int:
+    total = sum(size for _, size, _ in parts)
+    if words and separator.strip():
+        # Joining with ". " leaves a standalone "." word after a part that ends in whitespace
+        total += sum(1 for text, _, _ in parts[:-1] if text[-1:].isspace())
+    return total
 
-    current_chunk: list[str] = []
+
+def _pack(
+    parts: Iterable[tuple[str, int, PageSpan]],
+    level: int,
+    chunk_size: int,
+    chunk_overlap: int,
+    counter: TokenCounter,
+    words: bool,
+) -> Iterator[tuple[str, int | None, int | None]]:
+    separator = SEPARATORS[level]
+
+    def emit(chunk_parts: list[tuple[str, int, PageSpan]]):
+        chunk = separator.join(text for text, _, _ in chunk_parts).strip()
+        if not chunk:
+            return
+        span = _merge_spans([span for _, _, span in chunk_parts])
+        if level + 1 < len(SEPARATORS) and _joined_size(chunk_parts, separator, words) > chunk_size * 1.5:
+            sub_parts = chunk.split(SEPARATORS[level + 1])
+            yield from _pack(
+                zip(sub_parts, counter(sub_parts), repeat(span)),
+                level + 1, chunk_size, chunk_overlap, counter, words,
+            )
+        else:
+            yield chunk, span[0], span[1]
+
+    current: list[tuple[str, int, PageSpan]] = []
     current_size = 0
 
     for part in parts:
-        part_size = len(part.split())
-        if not part.strip():
+        text, size, _ = part
+        if not text.strip():
             continue
 
-        if current_size + part_size > chunk_size and current_chunk:
-            chunk_text_str = separator.join(current_chunk).strip()
-            if chunk_text_str:
-                if remaining_separators and len(chunk_text_str.split()) > chunk_size * 1.5:
-                    sub_chunks = _recursive_split(chunk_text_str, remaining_separators, chunk_size, chunk_overlap)
-                    chunks.extend(sub_chunks)
-                else:
-                    chunks.append(chunk_text_str)
-
-            # Keep overlap
-            overlap_parts: list[str] = []
+        if current_size + size > chunk_size and current:
+            yield from emit(current)
+
+            # Keep the longest tail that fits in the overlap budget
+            keep = 0
             overlap_size = 0
-            for p in reversed(current_chunk):
-                p_size = len(p.split())
+            for _, p_size, _ in reversed(current):
                 if overlap_size + p_size > chunk_overlap:
                     break
-                overlap_parts.insert(0, p)
                 overlap_size += p_size
+                keep += 1
 
-            current_chunk = overlap_parts + [part]
-            current_size = overlap_size + part_size
+            current = current[len(current) - keep:] if keep else []
+            current.append(part)
+            current_size = overlap_size + size
         else:
-            current_chunk.append(part)
-            current_size += part_size
-
-    if current_chunk:
-        chunk_text_str = separator.join(current_chunk).strip()
-        if chunk_text_str:
-            if remaining_separators and len(chunk_text_str.split()) > chunk_size * 1.5:
-                sub_chunks = _recursive_split(chunk_text_str, remaining_separators, chunk_size, chunk_overlap)
-                chunks.extend(sub_chunks)
-            else:
-                chunks.append(chunk_text_str)
-
-    return chunks
+            current.append(part)
+            current_size += size
+
+    if current:
+        yield from emit(current)
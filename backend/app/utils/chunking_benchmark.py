@@ -0,0 +1,128 @@
+"""Micro-benchmark for the streaming chunker against the previous implementation.
+
+Usage: python -m app.utils.chunking_benchmark [--megabytes 4] [--chunk-size 512] [--overlap 50]
+"""
+import argparse
+import random
+import time
+
+from app.utils.chunking import chunk_text
+
+WORDS = [
+    "the", "system", "retrieval", "index", "error", "E1042", "policy", "document", "vector",
+    "search", "latency", "throughput", "customer", "archive", "report", "quarterly", "manual",
+]
+
+
+def _synthetic_text(megabytes: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    target = int(megabytes * 1024 * 1024)
+    paragraphs = []
+    size = 0
+    while size < target:
+        sentences = []
+        for _ in range(rng.randint(1, 12)):
+            sentences.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 30))))
+        # Occasional very long paragraphs exercise the sentence and word levels
+        if rng.random() < 0.05:
+            sentences *= 40
+        lines = ". ".join(sentences) + "."
+        if rng.random() < 0.3:
+            lines = lines.replace(". ", ".\n", 3)
+        paragraphs.append(lines)
+        size += len(lines) + 2
+    return "\n\n".join(paragraphs)
+
+
+# Previous implementation, kept verbatim as the reference for output and timing
+def legacy_chunk_text(text: str, chunk_size: int = 512, chunk_overlap: int = 50) -> list[str]:
+    """Split text into overlapping chunks using a recursive strategy.
+
+    Splits by paragraph first, then sentence, then word boundaries.
+    chunk_size and chunk_overlap are in approximate word counts.
+    """
+    if not text.strip():
+        return []
+
+    separators = ["\n\n", "\n", ". ", " "]
+    return _legacy_recursive_split(text, separators, chunk_size, chunk_overlap)
+
+
+def _legacy_recursive_split(text: str, separators: list[str], chunk_size: int, chunk_overlap: int) -> list[str]:
+    chunks: list[str] = []
+    separator = separators[0]
+    remaining_separators = separators[1:]
+
+    parts = text.split(separator)
+
+    current_chunk: list[str] = []
+    current_size = 0
+
+    for part in parts:
+        part_size = len(part.split())
+        if not part.strip():
+            continue
+
+        if current_size + part_size > chunk_size and current_chunk:
+            chunk_text_str = separator.join(current_chunk).strip()
+            if chunk_text_str:
+                if remaining_separators and len(chunk_text_str.split()) > chunk_size * 1.5:
+                    sub_chunks = _legacy_recursive_split(chunk_text_str, remaining_separators, chunk_size, chunk_overlap)
+                    chunks.extend(sub_chunks)
+                else:
+                    chunks.append(chunk_text_str)
+
+            # Keep overlap
+            overlap_parts: list[str] = []
+            overlap_size = 0
+            for p in reversed(current_chunk):
+                p_size = len(p.split())
+                if overlap_size + p_size > chunk_overlap:
+                    break
+                overlap_parts.insert(0, p)
+                overlap_size += p_size
+
+            current_chunk = overlap_parts + [part]
+            current_size = overlap_size + part_size
+        else:
+            current_chunk.append(part)
+            current_size += part_size
+
+    if current_chunk:
+        chunk_text_str = separator.join(current_chunk).strip()
+        if chunk_text_str:
+            if remaining_separators and len(chunk_text_str.split()) > chunk_size * 1.5:
+                sub_chunks = _legacy_recursive_split(chunk_text_str, remaining_separators, chunk_size, chunk_overlap)
+                chunks.extend(sub_chunks)
+            else:
+                chunks.append(chunk_text_str)
+
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=float, default=4)
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--overlap", type=int, default=50)
+    args = parser.parse_args()
+
+    text = _synthetic_text(args.megabytes)
+    print(f"{len(text) / 1024 / 1024:.1f} MB, chunk size {args.chunk_size}, overlap {args.overlap}")
+
+    start = time.perf_counter()
+    expected = legacy_chunk_text(text, args.chunk_size, args.overlap)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = chunk_text(text, args.chunk_size, args.overlap)
+    new_seconds = time.perf_counter() - start
+
+    print(f"{'chunker':<10} {'seconds':>9} {'MB/s':>8} {'chunks':>8}")
+    for name, seconds, chunks in (("legacy", legacy_seconds, expected), ("streaming", new_seconds, actual)):
+        print(f"{name:<10} {seconds:>9.3f} {args.megabytes / seconds:>8.1f} {len(chunks):>8}")
+    print(f"identical output: {actual == expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import asyncio
+import hashlib
+import os
+import uuid
+
+from fastapi import UploadFile
+
+UPLOAD_READ_SIZE = 1024 * 1024
+
+
+async def stream_upload_to_disk(file: UploadFile, directory: str) -> tuple[str, str, int]:
+    """Copy an upload to a temporary file in ``directory`` chunk by chunk.
+
+    Reads go through UploadFile's async API and writes run in a worker
+    thread, so the event loop never blocks on disk I/O and the whole file
+    is never held in memory. Returns (temp path, sha256 hex digest, size).
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f".upload-{uuid.uuid4().hex}")
+    digest = hashlib.sha256()
+    size = 0
+
+    f = await asyncio.to_thread(open, path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_READ_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+            await asyncio.to_thread(f.write, chunk)
+    except BaseException:
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(os.remove, path)
+        raise
+    await asyncio.to_thread(f.close)
+    return path, digest.hexdigest(), size
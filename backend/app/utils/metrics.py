@@ -0,0 +1,31 @@
+import bisect
+import threading
+
+
+class Histogram:
+    """Fixed-bucket histogram; each bucket counts observations <= its upper bound."""
+
+    def __init__(self, buckets: list[float]):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            labels = [f"le_{b:g}" for b in self.buckets] + ["inf"]
+            return {
+                "count": self.count,
+                "mean": round(self.total / self.count, 3) if self.count else 0.0,
+                "max": round(self.max, 3),
+                "buckets": dict(zip(labels, self._counts)),
+            }
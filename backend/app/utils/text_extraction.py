@@ -1,22 +1,187 @@
+import codecs
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterator
+
 import chardet
 import fitz  # PyMuPDF
 
+from app.config import settings
 
-def extract_text_from_txt(filepath: str) -> str:
+_pdf_pool: ProcessPoolExecutor | None = None
+
+# Where a block without line breaks may be cut
+_INLINE_WHITESPACE = (" ", "\t", "\r", "\f", "\v")
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        # spawn keeps workers free of the parent's model weights and threads
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pdf_pool
+
+
+def shutdown_pdf_pool():
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+
+def _read_blocks(filepath: str) -> Iterator[bytes]:
+    size = os.path.getsize(filepath)
+    if size == 0:
+        return
+    block = settings.TEXT_DECODE_BLOCK_SIZE
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for offset in range(0, size, block):
+            yield mm[offset:offset + block]
+
+
+def detect_encoding(filepath: str) -> str:
+    """Return "utf-8" (or "utf-8-sig") if the file is valid UTF-8, else a sampled chardet guess.
+
+    Validation streams through the file with an incremental decoder; chardet
+    only ever sees the head of the file plus a window around the first byte
+    that is not UTF-8, so its cost does not grow with file size.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    consumed = 0
+    head = b""
+    try:
+        for data in _read_blocks(filepath):
+            if not head:
+                head = data[:3]
+            decoder.decode(data)
+            consumed += len(data)
+        decoder.decode(b"", final=True)
+        return "utf-8-sig" if head == codecs.BOM_UTF8 else "utf-8"
+    except UnicodeDecodeError as e:
+        failed_at = consumed + e.start
+
+    sample_size = settings.TEXT_DETECT_SAMPLE_SIZE
     with open(filepath, "rb") as f:
-        raw = f.read()
-    detected = chardet.detect(raw)
-    encoding = detected.get("encoding", "utf-8") or "utf-8"
-    return raw.decode(encoding, errors="replace")
+        sample = f.read(sample_size // 2)
+        f.seek(max(failed_at - sample_size // 4, len(sample)))
+        sample += f.read(sample_size // 2)
+    detected = chardet.detect(sample)
+    return detected.get("encoding", "utf-8") or "utf-8"
 
 
-def extract_text_from_pdf(filepath: str) -> str:
+def iter_text_blocks(filepath: str, encoding: str | None = None) -> Iterator[str]:
+    """Decode a text file incrementally, yielding blocks cut at paragraph breaks.
+
+    Blocks split where str.split("\n\n") would, so "\n\n".join(blocks)
+    reproduces the file. A block with no paragraph break is flushed once it
+    reaches four decode blocks, bounding memory on files without blank lines:
+    it is cut at its last line break, else its last whitespace (dropping that
+    one character), and only cut mid-word when it has neither.
+    """
+    encoding = encoding or detect_encoding(filepath)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    limit = settings.TEXT_DECODE_BLOCK_SIZE * 4
+    pending = ""
+    emitted = False
+
+    for data in _read_blocks(filepath):
+        pending += decoder.decode(data)
+        cut = pending.rfind("\n\n")
+        # Cut at the start of a newline run, as a left-to-right split would
+        while cut > 0 and pending[cut - 1] == "\n":
+            cut -= 1
+        if cut >= 0:
+            yield pending[:cut]
+            pending = pending[cut + 2:]
+            emitted = True
+        elif len(pending) >= limit:
+            cut = pending.rfind("\n")
+            if cut <= 0:
+                cut = max(pending.rfind(c) for c in _INLINE_WHITESPACE)
+            if cut > 0:
+                yield pending[:cut]
+                pending = pending[cut + 1:]
+            else:
+                yield pending
+                pending = ""
+            emitted = True
+
+    pending += decoder.decode(b"", final=True)
+    if pending or emitted:
+        yield pending
+
+
+def extract_text_from_txt(filepath: str) -> str:
+    return "\n\n".join(iter_text_blocks(filepath))
+
+
+def _extract_page_range(filepath: str, start: int, end: int) -> list[str]:
     doc = fitz.open(filepath)
-    pages = []
-    for page in doc:
-        pages.append(page.get_text())
-    doc.close()
-    return "\n\n".join(pages)
+    try:
+        return [doc[i].get_text() for i in range(start, end)]
+    finally:
+        doc.close()
+
+
+def iter_pdf_pages(filepath: str) -> Iterator[tuple[int, str]]:
+    """Yield (1-based page number, text) in page order.
+
+    Page ranges of PDF_PAGES_PER_TASK are extracted in a process pool with a
+    bounded number in flight, so memory stays proportional to the window
+    rather than the document and consumers can start before the last page.
+    """
+    with fitz.open(filepath) as doc:
+        page_count = doc.page_count
+
+    step = settings.PDF_PAGES_PER_TASK
+    if page_count <= step or settings.PDF_EXTRACT_WORKERS <= 1:
+        for start in range(0, page_count, step):
+            for offset, text in enumerate(_extract_page_range(filepath, start, min(start + step, page_count))):
+                yield start + offset + 1, text
+        return
+
+    pool = _get_pdf_pool()
+    window = settings.PDF_EXTRACT_WORKERS * 2
+    ranges = iter(range(0, page_count, step))
+    inflight: list[tuple[int, Future]] = []
+
+    def submit_next():
+        start = next(ranges, None)
+        if start is not None:
+            inflight.append((start, pool.submit(_extract_page_range, filepath, start, min(start + step, page_count))))
+
+    for _ in range(window):
+        submit_next()
+    try:
+        while inflight:
+            start, future = inflight.pop(0)
+            pages = future.result()
+            submit_next()
+            for offset, text in enumerate(pages):
+                yield start + offset + 1, text
+    finally:
+        for _, future in inflight:
+            future.cancel()
+
+
+def extract_text_from_pdf(filepath: str) -> str:
+    return "\n\n".join(text for _, text in iter_pdf_pages(filepath))
+
+
+def iter_pages(filepath: str, file_type: str) -> Iterator[tuple[int | None, str]]:
+    """Yield (page number, text) units; plain text streams as unnumbered paragraph blocks."""
+    if file_type == "pdf":
+        yield from iter_pdf_pages(filepath)
+    elif file_type == "txt":
+        for block in iter_text_blocks(filepath):
+            yield None, block
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
 
 
 def extract_text(filepath: str, file_type: str) -> str:
@@ -0,0 +1,39 @@
+"""Standalone ingestion worker.
+
+Usage: python -m app.worker [--concurrency N]
+"""
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.config import settings
+from app.services.embedding import embedding_service
+from app.services.ingest_worker import IngestWorker
+from app.utils.text_extraction import shutdown_pdf_pool
+
+
+async def _run(concurrency: int):
+    embedding_service.load_model()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await IngestWorker(concurrency).run(stop)
+    finally:
+        embedding_service.shutdown()
+        shutdown_pdf_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LocalRAG ingestion worker")
+    parser.add_argument("--concurrency", type=int, default=settings.INGEST_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    asyncio.run(_run(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
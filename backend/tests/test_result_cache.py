@@ -0,0 +1,48 @@
+import asyncio
+import uuid
+
+from app.services.result_cache import LocalSharedClient, SharedResultCache
+
+
+def _results() -> list[dict]:
+    return [
+        {
+            "chunk_id": uuid.uuid4(),
+            "document_id": uuid.uuid4(),
+            "chunk_index": 3,
+            "content": "Quarterly revenue grew 12%.",
+            "filename": "report.pdf",
+            "score": 0.8731,
+            "duplicates": [
+                {"chunk_id": uuid.uuid4(), "document_id": uuid.uuid4(), "filename": "report-copy.pdf", "chunk_index": 3},
+            ],
+        },
+        {
+            "chunk_id": uuid.uuid4(),
+            "document_id": uuid.uuid4(),
+            "chunk_index": 0,
+            "content": "Introduction",
+            "filename": "notes.md",
+            "score": 0.5,
+            "duplicates": [],
+        },
+    ]
+
+
+def test_shared_cache_hit_matches_miss():
+    cache = SharedResultCache(LocalSharedClient(), ttl=60)
+    results = _results()
+
+    async def round_trip():
+        await cache.set("key", results)
+        return await cache.get("key")
+
+    cached = asyncio.run(round_trip())
+    assert cached == results
+    assert isinstance(cached[0]["chunk_id"], uuid.UUID)
+    assert isinstance(cached[0]["duplicates"][0]["document_id"], uuid.UUID)
+
+
+def test_shared_cache_miss():
+    cache = SharedResultCache(LocalSharedClient(), ttl=60)
+    assert asyncio.run(cache.get("missing")) is None
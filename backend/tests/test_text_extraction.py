@@ -0,0 +1,42 @@
+from app.config import settings
+from app.utils.text_extraction import iter_text_blocks
+
+
+def _write(tmp_path, text: str) -> str:
+    path = tmp_path / "doc.txt"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_forced_flush_cuts_at_line_breaks(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TEXT_DECODE_BLOCK_SIZE", 64)
+    # No blank lines, so every flush is forced
+    lines = [f"line {i} holds several words of text" for i in range(200)]
+    text = "\n".join(lines)
+
+    blocks = list(iter_text_blocks(_write(tmp_path, text), encoding="utf-8"))
+
+    assert len(blocks) > 1
+    assert "\n".join(blocks) == text
+    assert [line for block in blocks for line in block.split("\n")] == lines
+
+
+def test_forced_flush_cuts_at_whitespace_without_line_breaks(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TEXT_DECODE_BLOCK_SIZE", 64)
+    words = [f"word{i}" for i in range(500)]
+    text = " ".join(words)
+
+    blocks = list(iter_text_blocks(_write(tmp_path, text), encoding="utf-8"))
+
+    assert len(blocks) > 1
+    assert [word for block in blocks for word in block.split()] == words
+
+
+def test_forced_flush_without_any_break(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TEXT_DECODE_BLOCK_SIZE", 64)
+    text = "x" * 1000
+
+    blocks = list(iter_text_blocks(_write(tmp_path, text), encoding="utf-8"))
+
+    assert len(blocks) > 1
+    assert "".join(blocks) == text
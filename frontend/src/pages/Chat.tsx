@@ -99,7 +99,10 @@ export function ChatPage() {
     }
   };
 
-  const messages: ChatMessage[] = session?.messages || [];
+  // Summaries are prompt material for the model, not part of the visible transcript
+  const messages: ChatMessage[] = (session?.messages || []).filter(
+    (msg) => msg.role !== "summary"
+  );
 
   return (
     <div className="flex h-[calc(100vh-8rem)] gap-4">
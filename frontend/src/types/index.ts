@@ -3,6 +3,7 @@ export interface Document {
   filename: string;
   file_type: string;
   file_size: number | null;
+  content_hash: string | null;
   status: "pending" | "processing" | "completed" | "failed";
   chunk_count: number;
   error_message: string | null;
@@ -10,11 +11,35 @@ export interface Document {
   updated_at: string | null;
 }
 
+export interface DocumentProgressEvent {
+  document_id: string;
+  stage:
+    | "queued"
+    | "extracting"
+    | "embedding"
+    | "writing"
+    | "retrying"
+    | "pending"
+    | "processing"
+    | "completed"
+    | "failed";
+  extracted_pages?: number;
+  chunks_produced?: number;
+  chunks_reused?: number;
+  chunks_embedded?: number;
+  rows_written?: number;
+  chunk_count?: number;
+  error?: string | null;
+  ts?: number;
+}
+
 export interface Chunk {
   id: string;
   chunk_index: number;
   content: string;
   token_count: number | null;
+  page_start: number | null;
+  page_end: number | null;
   created_at: string;
 }
 
@@ -24,8 +49,18 @@ export interface DocumentDetail extends Document {
 
 export interface SearchRequest {
   query: string;
+  mode?: "vector" | "lexical" | "hybrid";
   top_k?: number;
   threshold?: number;
+  ef_search?: number;
+  probes?: number;
+}
+
+export interface DuplicateSource {
+  chunk_id: string;
+  document_id: string;
+  filename: string;
+  chunk_index: number;
 }
 
 export interface SearchResultItem {
@@ -35,12 +70,15 @@ export interface SearchResultItem {
   chunk_index: number;
   content: string;
   score: number;
+  duplicates?: DuplicateSource[];
 }
 
 export interface SearchResponse {
   query: string;
+  mode: "vector" | "lexical" | "hybrid";
   results: SearchResultItem[];
   total: number;
+  timings: Record<string, number>;
 }
 
 export interface ChatSession {
@@ -55,9 +93,11 @@ export interface ChatSession {
 export interface ChatMessage {
   id: string;
   session_id: string;
-  role: "user" | "assistant" | "system";
+  role: "user" | "assistant" | "system" | "summary";
   content: string;
   context_chunks: string[] | null;
+  timings?: Record<string, number> | null;
+  summary_until?: string | null;
   created_at: string;
 }
 